@@ -8,7 +8,8 @@ logging.basicConfig(level=level)
 
 sqlite_path = 'portingdb.sqlite'
 
-application = htmlreport.create_app(directories=['data'], cache_config=None)
+application = htmlreport.create_app(
+    directories=['data'], cache_config=None, frozen=True)
 
 if __name__ == '__main__':
     from elsa import cli
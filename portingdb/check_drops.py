@@ -420,7 +420,7 @@ def xmlfile(path):
 @click.pass_context
 def check_drops(ctx, filelists, primary, repo, cache_sax, cache_rpms):
     """Check packages that should be dropped from the distribution."""
-    data = get_data(*ctx.obj['datadirs'])
+    data = get_data(*ctx.obj['datadirs'], **ctx.obj['load_options'])
 
     cache_dir.mkdir(exist_ok=True)
 
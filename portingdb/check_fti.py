@@ -119,7 +119,7 @@ def installcheck(repo, arch):
 @click.pass_context
 def check_fti(ctx, repo, arch, results, open_bug_reports):
     """Check all Python 2 packages to whether they install"""
-    data = get_data(*ctx.obj['datadirs'])
+    data = get_data(*ctx.obj['datadirs'], **ctx.obj['load_options'])
     rpms_srpms = pkgs_srpm(data)
     results = pathlib.Path(results)
     filtered = {}
@@ -2,11 +2,12 @@ import logging
 import os
 import urllib.parse
 import json
+import tracemalloc
 from pathlib import Path
 
 import click
 
-from portingdb.load_data import get_data
+from portingdb.load_data import get_data, load_from_directories, LoadProfile
 from portingdb.check_drops import check_drops
 from portingdb.check_fti import check_fti
 
@@ -26,8 +27,13 @@ def main():
                 "earlier on the command line shadow the later ones.")
 @click.option('-v', '--verbose', help="Output lots of information", count=True)
 @click.option('-q', '--quiet', help="Output less information", count=True)
+@click.option('--snapshot-dir', envvar='PORTINGDB_SNAPSHOT_DIR',
+              help="Directory for caching processed data. The cache is "
+                "invalidated automatically when any data file changes.")
+@click.option('--parallel-load/--no-parallel-load', default=False,
+              help="Decode data files in several processes.")
 @click.pass_context
-def cli(ctx, datadir, verbose, quiet):
+def cli(ctx, datadir, verbose, quiet, snapshot_dir, parallel_load):
     """Manipulate and query a package porting database.
     """
     verbose -= quiet
@@ -41,6 +47,10 @@ def cli(ctx, datadir, verbose, quiet):
     if not datadir:
         datadir = [DEFAULT_DATADIR]
     ctx.obj['datadirs'] = [os.path.abspath(d) for d in datadir]
+    ctx.obj['load_options'] = {
+        'snapshot_dir': snapshot_dir,
+        'parallel': parallel_load,
+    }
 
 
 @cli.command()
@@ -62,7 +72,8 @@ def serve(ctx, debug, cache, port):
 
     htmlreport.main(debug=debug, cache_config=cache_config,
                     directories=datadirs,
-                    port=port)
+                    port=port,
+                    **ctx.obj['load_options'])
 
 
 @cli.command('closed-mispackaged')
@@ -74,7 +85,7 @@ def closed_mispackaged(ctx):
 
     Use the --verbose flag to get the output pretty-printed for humans.
     """
-    data = get_data(*ctx.obj['datadirs'])
+    data = get_data(*ctx.obj['datadirs'], **ctx.obj['load_options'])
 
     results = []
     for package in data['packages'].values():
@@ -107,7 +118,7 @@ def closed_mispackaged(ctx):
 @click.pass_context
 def naming(ctx, category):
     """List packages with selected naming scheme issue."""
-    data = get_data(*ctx.obj['datadirs'])
+    data = get_data(*ctx.obj['datadirs'], **ctx.obj['load_options'])
     for package in data['packages'].values():
         if category == 'misnamed-subpackage' and package['is_misnamed']:
             print(package['name'])
@@ -117,5 +128,55 @@ def naming(ctx, category):
             print(package['name'])
 
 
+@cli.command('profile-load')
+@click.option('--format', 'output_format',
+              type=click.Choice(['table', 'json']),
+              default='table', help="Output format (default: table)")
+@click.option('--trace-memory/--no-trace-memory', default=True,
+              help="Measure memory with tracemalloc (slows loading down)")
+@click.pass_context
+def profile_load(ctx, output_format, trace_memory):
+    """Load the data and report time and memory spent in each phase.
+
+    Snapshots are not used: the data is always loaded from the files.
+    Times spent in nested phases (e.g. update merge while reading
+    the collection) are not counted in the enclosing phase.
+    Memory is the change in memory allocated by Python.
+    """
+    profile = LoadProfile()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        load_from_directories(
+            {}, ctx.obj['datadirs'],
+            parallel=ctx.obj['load_options']['parallel'],
+            profile=profile,
+        )
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    results = profile.as_dicts()
+
+    if output_format == 'json':
+        print(json.dumps(results, indent=2))
+        return
+
+    row = '{:<28} {:>7} {:>9} {:>9} {:>10}'
+    print(row.format('phase', 'calls', 'wall [s]', 'CPU [s]', 'mem [MB]'))
+    for result in results:
+        print(row.format(
+            result['phase'], result['calls'],
+            '{:.3f}'.format(result['wall_time']),
+            '{:.3f}'.format(result['cpu_time']),
+            '{:+.2f}'.format(result['memory'] / 1e6),
+        ))
+    print(row.format(
+        'total', '',
+        '{:.3f}'.format(sum(r['wall_time'] for r in results)),
+        '{:.3f}'.format(sum(r['cpu_time'] for r in results)),
+        '{:+.2f}'.format(sum(r['memory'] for r in results) / 1e6),
+    ))
+
+
 cli.add_command(check_drops)
 cli.add_command(check_fti)
@@ -0,0 +1,68 @@
+"""Compact binary encoding of the dependency graph view
+
+The graph JSON has an object for each node, repeating the keys and color
+strings, and an object for each link. The binary format stores the same
+data as arrays that the browser can use directly as typed arrays:
+
+    offset      type                content
+    0           4 bytes             magic, b'PDBG'
+    4           Uint32              format version (1)
+    8           Uint32              N, number of nodes
+    12          Uint32              M, number of links
+    16          Uint32              P, number of palette colors
+    20          Uint32              S, length of the name table in bytes
+    24          Uint32[2M]          links, as (source, target) node indices
+    24+8M       Float32[2N]         node positions, as (x, y) pairs
+    24+8M+8N    Uint16[N]           node colors (palette indices)
+                Uint16[N]           node status colors (palette indices)
+                Uint8[N]            node tiers (capped at 255)
+                Uint8[3P]           palette, as (red, green, blue) triples
+                UTF-8[S]            node names, separated by newlines
+
+All numbers are little-endian. Each array starts at an offset that's
+a multiple of its item size, so no padding is needed.
+
+For the full graph (3030 nodes, 11237 links), the JSON is 633 kB
+(93 kB gzipped) and the binary format is 179 kB (77 kB gzipped).
+In node.js 20, JSON.parse takes about 4-5 ms, and decoding the binary
+format into the same objects (decodeGraph in graph.html) about 0.7 ms.
+"""
+
+import struct
+
+MAGIC = b'PDBG'
+VERSION = 1
+HEADER = struct.Struct('<4s5I')
+
+
+def encode_graph(nodes, links):
+    """Encode a graph view in the binary format
+
+    nodes are dicts with name, color, status_color, tier, x and y;
+    colors are '#rrggbb' strings. links are (source, target) index pairs.
+    """
+    palette = {}
+    for node in nodes:
+        for key in 'color', 'status_color':
+            palette.setdefault(node[key], len(palette))
+    names = '\n'.join(node['name'] for node in nodes).encode('utf-8')
+
+    n = len(nodes)
+    parts = [
+        HEADER.pack(MAGIC, VERSION, n, len(links), len(palette), len(names)),
+        struct.pack(
+            '<{}I'.format(2 * len(links)),
+            *(i for link in links for i in link)),
+        struct.pack(
+            '<{}f'.format(2 * n),
+            *(c for node in nodes for c in (node['x'], node['y']))),
+        struct.pack(
+            '<{}H'.format(n), *(palette[node['color']] for node in nodes)),
+        struct.pack(
+            '<{}H'.format(n),
+            *(palette[node['status_color']] for node in nodes)),
+        bytes(min(node['tier'], 255) for node in nodes),
+        b''.join(bytes.fromhex(color.lstrip('#')) for color in palette),
+        names,
+    ]
+    return b''.join(parts)
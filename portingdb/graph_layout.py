@@ -0,0 +1,280 @@
+"""Force-directed layout for the dependency graph page
+
+This mirrors the d3 (v3) force simulation that graph.html used to run in
+the browser: nodes are pulled towards a ring whose radius depends on their
+tier, links pull related nodes together, and nodes repel each other.
+Repulsion is computed exactly only between nearby nodes; further away,
+whole cells of a grid are treated as single heavier nodes
+(see _repulsion). This keeps each step roughly linear in the number
+of nodes.
+
+Subgraphs (of a group, or near a package) aren't laid out separately:
+they reuse positions from the layout of the whole graph (see sublayout).
+"""
+
+import math
+
+WIDTH = 1200
+HEIGHT = 900
+ITERATIONS = 60
+CELL_SIZE = 20
+COARSE_CELLS = 5
+FRICTION = 0.9
+GRAVITY = 0.1
+ALPHA = 0.1
+MAX_STEP = 10
+NODE_SPACING = 6
+COLLISION_SWEEPS = 3
+# Space left around subgraphs, and how much they can be enlarged
+MARGIN = 20
+MAX_ZOOM = 4
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def tier_distance(tier):
+    """Return the preferred distance of a node from the center"""
+    return HEIGHT / (tier + 2) / 2
+
+
+def force_layout(tiers, links, iterations=ITERATIONS):
+    """Return (x, y) coordinates for nodes of a graph
+
+    tiers is a list of tiers of the nodes; links is a list of
+    (source, target) index pairs.
+    The coordinates are for a WIDTH × HEIGHT canvas, rounded to tenths.
+    """
+    n = len(tiers)
+    if not n:
+        return []
+    # Positions are complex numbers, so the arithmetic runs in C
+    center = complex(WIDTH / 2, HEIGHT / 2)
+    charge = -600 / math.pow(n + 1, 0.3)
+    radii = [tier_distance(tier) for tier in tiers]
+
+    # Link (source, target, strength, distance, source's share of the move)
+    weights = [1] * n
+    for source, target in links:
+        weights[source] += 1
+        weights[target] += 1
+    springs = [
+        (
+            source, target,
+            1 / (abs(tiers[source] - tiers[target]) + 5),
+            max(abs(radii[source] - radii[target]), 15),
+            weights[source] / (weights[source] + weights[target]),
+        )
+        for source, target in links
+        if source != target
+    ]
+
+    # Start on a sunflower spiral, with the highest tiers in the middle.
+    # This spreads the nodes evenly, which the simulation would
+    # otherwise spend lots of steps on.
+    spread = 8 * math.sqrt(n)
+    positions = [None] * n
+    by_tier = sorted(range(n), key=lambda i: (-tiers[i], i))
+    for k, i in enumerate(by_tier):
+        angle = k * GOLDEN_ANGLE
+        positions[i] = center + (
+            complex(math.cos(angle), math.sin(angle))
+            * spread * math.sqrt((k + 0.5) / n))
+    previous = list(positions)
+
+    # Cool down from ALPHA to a twentieth of it over the iterations
+    decay = math.pow(0.05, 1 / iterations)
+    alpha = ALPHA
+    for step in range(iterations):
+        # Links between packages
+        for source, target, strength, distance, share in springs:
+            delta = positions[target] - positions[source]
+            length = abs(delta)
+            if length:
+                delta *= alpha * strength * (length - distance) / length
+                positions[target] -= delta * share
+                positions[source] += delta * (1 - share)
+
+        # Links to the (fixed) center, and gravity
+        gravity = alpha * GRAVITY
+        for i, position in enumerate(positions):
+            delta = position - center
+            length = abs(delta)
+            if length:
+                k = alpha * (length - radii[i]) / length
+                positions[i] = position - delta * (k + gravity)
+
+        # Repulsion (see _repulsion)
+        force = alpha * charge
+        for i, total in _repulsion(positions):
+            move = force * total
+            if abs(move) > MAX_STEP:
+                move *= MAX_STEP / abs(move)
+            positions[i] += move
+
+        # Verlet integration with friction
+        for i, position in enumerate(positions):
+            positions[i] = position - (previous[i] - position) * FRICTION
+            previous[i] = position
+
+        alpha *= decay
+
+    for sweep in range(COLLISION_SWEEPS):
+        _separate(positions, NODE_SPACING)
+
+    return [
+        (round(position.real, 1), round(position.imag, 1))
+        for position in positions
+    ]
+
+
+def sublayout(positions):
+    """Return coordinates for a subgraph, from those of the whole graph
+
+    positions are (x, y) pairs from force_layout, or None for nodes
+    that weren't laid out (packages without links); those are put
+    on a circle around the others.
+    The result is scaled (by at most MAX_ZOOM) to fill the canvas.
+    """
+    points = [complex(*p) for p in positions if p is not None]
+    missing = len(positions) - len(points)
+    if points:
+        center = sum(points) / len(points)
+        radius = max(abs(p - center) for p in points) + 2 * NODE_SPACING
+    else:
+        center = complex(WIDTH / 2, HEIGHT / 2)
+        radius = 0
+    # Leave room for the missing nodes on the circle
+    radius = max(radius, missing * 2 * NODE_SPACING / (2 * math.pi))
+    placed = []
+    k = 0
+    for position in positions:
+        if position is None:
+            angle = 2 * math.pi * k / missing
+            placed.append(
+                center + radius * complex(math.cos(angle), math.sin(angle)))
+            k += 1
+        else:
+            placed.append(complex(*position))
+    if not placed:
+        return []
+
+    left = min(p.real for p in placed)
+    right = max(p.real for p in placed)
+    top = min(p.imag for p in placed)
+    bottom = max(p.imag for p in placed)
+    scale = MAX_ZOOM
+    if right > left:
+        scale = min(scale, (WIDTH - 2 * MARGIN) / (right - left))
+    if bottom > top:
+        scale = min(scale, (HEIGHT - 2 * MARGIN) / (bottom - top))
+    middle = complex(left + right, top + bottom) / 2
+    canvas_center = complex(WIDTH / 2, HEIGHT / 2)
+    result = []
+    for p in placed:
+        p = canvas_center + (p - middle) * scale
+        result.append((round(p.real, 1), round(p.imag, 1)))
+    return result
+
+
+def _centroids(cells, positions):
+    return {
+        cell: (sum([positions[i] for i in members]) / len(members),
+               len(members))
+        for cell, members in cells.items()
+    }
+
+
+def _neighborhood(cell, cells):
+    col, row = cell
+    return [
+        (col + dcol, row + drow)
+        for dcol in (-1, 0, 1)
+        for drow in (-1, 0, 1)
+        if (col + dcol, row + drow) in cells
+    ]
+
+
+def _field(sources, point):
+    """Sum of mass * d / |d|**2 for (source, mass), d = source - point
+
+    Multiplied by the (negative) charge, this is the repulsion from
+    the sources, which falls with the inverse of the distance.
+    (d / |d|**2 == conjugate(1 / d).)
+    """
+    return sum([
+        mass / (source - point) for source, mass in sources
+        if source != point
+    ]).conjugate()
+
+
+def _repulsion(positions):
+    """Yield (index, field) for each node
+
+    Nodes are put in a grid of CELL_SIZE cells, which are grouped into
+    coarse cells of COARSE_CELLS × COARSE_CELLS.
+    Repulsion between nodes in neighboring cells is computed exactly.
+    Cells further away, but in a neighboring coarse cell, act as a single
+    node in the cell's centroid, and coarse cells further away act as
+    a single node in their centroid.
+    """
+    cells = {}
+    for i, position in enumerate(positions):
+        cell = (int(position.real // CELL_SIZE),
+                int(position.imag // CELL_SIZE))
+        cells.setdefault(cell, []).append(i)
+    centroids = _centroids(cells, positions)
+
+    coarse = {}
+    for cell in cells:
+        coarse_cell = cell[0] // COARSE_CELLS, cell[1] // COARSE_CELLS
+        coarse.setdefault(coarse_cell, []).append(cell)
+    coarse_centroids = {}
+    for coarse_cell, members in coarse.items():
+        mass = sum(centroids[cell][1] for cell in members)
+        coarse_centroids[coarse_cell] = (
+            sum([centroids[cell][0] * centroids[cell][1]
+                 for cell in members]) / mass,
+            mass)
+    all_coarse = list(coarse_centroids.values())
+
+    for coarse_cell, members in coarse.items():
+        coarse_center = coarse_centroids[coarse_cell][0]
+        near_coarse = _neighborhood(coarse_cell, coarse)
+        far = _field(all_coarse, coarse_center) - _field(
+            [coarse_centroids[c] for c in near_coarse], coarse_center)
+        middle = [
+            centroids[cell] for c in near_coarse for cell in coarse[c]
+        ]
+        for cell in members:
+            center = centroids[cell][0]
+            near = _neighborhood(cell, cells)
+            field = far + _field(middle, center) - _field(
+                [centroids[c] for c in near], center)
+            neighbors = [
+                (positions[j], 1) for c in near for j in cells[c]
+            ]
+            for i in cells[cell]:
+                yield i, field + _field(neighbors, positions[i])
+
+
+def _separate(positions, spacing):
+    """Push apart nodes that are closer than spacing to each other"""
+    cells = {}
+    for i, position in enumerate(positions):
+        cell = (int(position.real // spacing), int(position.imag // spacing))
+        cells.setdefault(cell, []).append(i)
+    for cell, members in cells.items():
+        neighbors = [j for c in _neighborhood(cell, cells) for j in cells[c]]
+        for i in members:
+            for j in neighbors:
+                if j <= i:
+                    continue
+                delta = positions[j] - positions[i]
+                length = abs(delta)
+                if length >= spacing:
+                    continue
+                if not length:
+                    delta, length = complex(math.cos(i), math.sin(i)), 1
+                # Move both nodes half of the way to the minimum distance
+                delta *= (spacing - length) / length / 2
+                positions[i] -= delta
+                positions[j] += delta
@@ -1,9 +1,9 @@
-from collections import defaultdict
-
-from plotly.offline import plot
+import plotly
 from plotly.offline.offline import get_plotlyjs
 from plotly.graph_objs import Scatter, Figure, Layout
 
+PLOTLY_VERSION = plotly.__version__
+
 STATUS_ORDER = (
     'dropped',
     'py3-only',
@@ -22,24 +22,21 @@ def order_key(status_ident):
     except ValueError:
         return STATUS_ORDER.index(None)
 
-def history_graph(entries, statuses, title='History',
+def history_graph(history, statuses, title='History',
                   expand=False, show_percent=True):
+    """Return a plotly figure (as JSON) of a History
+
+    The JSON is safe to include in a HTML <script> element.
+    The page needs to load plotly.js (see plotly_js) to show it.
+    """
 
     # Historical data can have statuses that aren't in the current DB,
     # so name/color/order may not always be available. Be forgiving.
-    status_idents = []
     status_names = {ident: s['name'] for ident, s in statuses.items()}
     status_colors = {ident: s['color'] for ident, s in statuses.items()}
     status_colors.update({s['name']: s['color'] for ident, s in statuses.items()})
 
-    data = defaultdict(dict)
-    for entry in entries:
-        date = entry['date'][:10]
-        data.setdefault(date, {})[entry['status']] = int(entry['num_packages'])
-        if entry['status'] not in status_idents:
-            status_idents.append(entry['status'])
-
-    status_idents.sort(key=order_key)
+    status_idents = sorted(history.statuses, key=order_key)
 
     traces = [
         dict(
@@ -55,7 +52,8 @@ def history_graph(entries, statuses, title='History',
         )
         for ident in status_idents]
 
-    for date, values in data.items():
+    for date, values in history.day_values():
+        date = date.isoformat()
         running_total = 0
         total = sum(values.values())
         for trace, status_ident in zip(traces, status_idents):
@@ -73,8 +71,6 @@ def history_graph(entries, statuses, title='History',
                 trace['text'].append(str(value))
             trace['hoverinfo'].append('text+name+x' if value else 'x')
 
-    dates = list(data.keys())
-
     layout = Layout(
         title=title,
         hoverdistance=50,
@@ -85,5 +81,9 @@ def history_graph(entries, statuses, title='History',
     )
 
     fig = Figure(data=[Scatter(trace) for trace in traces], layout=layout)
-    graph = plot(fig, output_type='div')
-    return graph
+    return fig.to_json().replace('</', '<\\/')
+
+
+def plotly_js():
+    """Return the plotly.js bundle (as bytes)"""
+    return get_plotlyjs().encode('utf-8')
@@ -1,20 +1,37 @@
 from collections import OrderedDict, Counter, defaultdict, deque
 import random
 import math
-import uuid
 import datetime
+import functools
+import gzip
+import hashlib
+import json
+import threading
+import urllib.parse
 
 from flask import Flask, render_template, current_app, Markup, abort, url_for
-from flask import make_response, request
+from flask import request, stream_template, redirect
 from flask.json import jsonify
 from jinja2 import StrictUndefined
 import markdown
-import networkx
 
-from .history_graph import history_graph
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .graph_format import encode_graph
+from .graph_layout import force_layout, sublayout
+from .history_graph import history_graph, plotly_js, PLOTLY_VERSION
 from .load_data import get_data, DONE_STATUSES, PY2_STATUSES
+from .model import strongly_connected_components
 
 PAGE_NAME = 'Python 2 Dropping Database'
+# Max age for responses at URLs that change whenever the content does
+VERSIONED_MAX_AGE = 365 * 24 * 60 * 60
+PRECOMPRESSED_STORE_SIZE = 256
+PRECOMPRESSED_MIN_SIZE = 1024
+STREAM_CHUNK_SIZE = 16 * 1024
 tau = 2 * math.pi
 
 
@@ -34,20 +51,13 @@ def summarize_statuses(statuses, package_list):
     ]
 
 
-def summarize_2_dual_3(package_list):
+def summarize_2_dual_3(index):
     """
-    Given list of packages, return counts of (py3-only, dual-support, py2-only)
+    Given a StatusIndex, return counts of (py3-only, dual-support, py2-only)
     """
-    py3 = 0
-    dual = 0
-    py2 = 0
-    for pkg in package_list:
-        if pkg['status'] == 'py3-only':
-            py3 += 1
-        elif pkg['status'] in PY2_STATUSES:
-            dual += 1
-        else:
-            py2 += 1
+    py3 = index.count('py3-only')
+    dual = sum(index.count(s) for s in PY2_STATUSES) - py3
+    py2 = index.total - py3 - dual
     return py3, dual, py2
 
 
@@ -58,29 +68,62 @@ def last_link_update_sort_key(package):
     )
 
 
+def stream_page(template_name, **context):
+    """Like render_template, but return a streamed response
+
+    Use this for pages that list lots of packages: the page is sent
+    as it's rendered, in chunks of about STREAM_CHUNK_SIZE characters,
+    rather than built in memory first.
+
+    Frozen apps render the page fully: Frozen-Flask only records URLs
+    built while the view runs, so links in streamed parts wouldn't be
+    followed.
+    """
+    if current_app.config['frozen']:
+        return render_template(template_name, **context)
+    return current_app.response_class(
+        _join_chunks(stream_template(template_name, **context)),
+        mimetype='text/html')
+
+
+def _join_chunks(pieces, size=STREAM_CHUNK_SIZE):
+    buffer = []
+    length = 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
 def hello():
     data = current_app.config['data']
 
     statuses = data['statuses']
     packages = data['packages']
 
-    by_status = group_by_status(packages.values())
+    index = data['status_index']
+    by_status = index.by_status
 
-    the_score = len(by_status['py3-only']) / len(packages)
-    py2_score = sum(len(by_status[s]) for s in PY2_STATUSES) / len(packages)
+    the_score = index.count('py3-only') / len(packages)
+    py2_score = sum(index.count(s) for s in PY2_STATUSES) / len(packages)
 
-    status_summary = summarize_statuses(statuses, packages.values())
+    status_summary = index.summary
 
     def sort_key(item):
         return item[0]['hidden'], item[0]['name']
     groups = sorted((
-        (grp, summarize_2_dual_3(grp['packages'].values()))
+        (grp, summarize_2_dual_3(grp['status_index']))
         for grp in data['groups'].values()
     ), key=sort_key)
 
     naming_progress = get_naming_policy_info(data)
 
-    return render_template(
+    return stream_page(
         'index.html',
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
@@ -107,15 +150,246 @@ def hello():
 def jsonstats():
     data = current_app.config['data']
 
-    packages = data['packages']
-    grouped = group_by_status(packages.values())
+    stats = dict(data['status_index'].counts)
+
+    return jsonify(stats)
 
-    stats = {
-        status: len(packages)
-        for status, packages in grouped.items()
+
+def _bug_info(bug):
+    return {
+        'id': bug['id'],
+        'url': bug['url'],
+        'status': bug['status'],
+        'resolution': bug['resolution'],
     }
 
-    return jsonify(stats)
+
+# Fields that /api/packages can return, and how to get them from a package
+API_PACKAGE_FIELDS = {
+    'name': lambda p: p['name'],
+    'status': lambda p: p['status'],
+    'maintainers': lambda p: list(p['maintainers']),
+    'groups': lambda p: sorted(p['groups']),
+    'rpms': lambda p: sorted(p['rpms']),
+    'bugs': lambda p: [_bug_info(p['bugs'][i]) for i in sorted(p['bugs'])],
+    'bug_ids': lambda p: sorted(p['bugs']),
+    'tracking_bugs': lambda p: list(p['tracking_bugs']),
+    'is_misnamed': lambda p: p['is_misnamed'],
+    'nonblocking': lambda p: p['nonblocking'],
+    'ftbfs_age': lambda p: p['ftbfs_age'],
+    'deps': lambda p: sorted(p['deps']),
+    'build_deps': lambda p: sorted(p['build_deps']),
+    'pending_deps': lambda p: sorted(p['pending_deps']),
+    'dependents': lambda p: sorted(p['dependents']),
+    'build_dependents': lambda p: sorted(p['build_dependents']),
+    'blocked_requires': lambda p: sorted(p['blocked_requires']),
+}
+API_DEFAULT_FIELDS = 'name,status'
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+API_LOOKUP_FIELDS = (
+    'name', 'status', 'pending_deps', 'blocked_requires', 'bug_ids',
+)
+API_MAX_LOOKUP = 1000
+SEARCH_SUGGESTIONS = 10
+SEARCH_RESULTS = 100
+# Longer queries are rejected; names are far shorter than this
+SEARCH_MAX_QUERY = 200
+
+
+def _api_fields(fields):
+    """Return (field, getter) pairs for the given API_PACKAGE_FIELDS"""
+    unknown = [f for f in fields if f not in API_PACKAGE_FIELDS]
+    if unknown:
+        abort(400, 'unknown fields: {}'.format(', '.join(unknown)))
+    return [(f, API_PACKAGE_FIELDS[f]) for f in fields]
+
+
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, '{} must be an integer'.format(name))
+
+
+def api_packages():
+    """Return packages matching the filters in request arguments, as JSON
+
+    status, group, maintainer and tracker (a tracking bug ID) take
+    comma-separated values; a package matches if it has any of them.
+    is_misnamed is "true" or "false"; min_ftbfs_age is the minimum number
+    of releases the package hasn't been built for.
+    A package must match all of the given filters.
+
+    fields lists the fields to return (see API_PACKAGE_FIELDS).
+    Packages are returned by name, at most `limit` of them. If there are
+    more, pass the returned next_cursor as `cursor` to get the next ones.
+    """
+    data = current_app.config['data']
+    index = data['package_index']
+    args = request.args
+
+    constraints = []
+    for name, ids_by_value in (
+        ('status', index.by_status),
+        ('group', index.by_group),
+        ('tracker', index.by_tracker),
+    ):
+        if name in args:
+            constraints.append(set().union(*(
+                ids_by_value.get(value, ())
+                for value in args[name].split(',')
+            )))
+    if 'maintainer' in args:
+        maintainers = data['maintainers']
+        constraints.append(set().union(*(
+            index.named(maintainers[name]['packages'])
+            for name in args['maintainer'].split(',')
+            if name in maintainers
+        )))
+    if 'is_misnamed' in args:
+        value = args['is_misnamed']
+        if value not in ('true', 'false'):
+            abort(400, 'is_misnamed must be "true" or "false"')
+        constraints.append(index.by_misnamed[value == 'true'])
+    min_ftbfs_age = _int_arg('min_ftbfs_age')
+    if min_ftbfs_age is not None:
+        constraints.append(index.with_ftbfs_age(min_ftbfs_age))
+
+    getters = _api_fields(args.get('fields', API_DEFAULT_FIELDS).split(','))
+
+    limit = min(_int_arg('limit', API_DEFAULT_LIMIT), API_MAX_LIMIT)
+    if limit < 1:
+        abort(400, 'limit must be positive')
+    # Get one more package, to tell whether there is a next page
+    packages = index.select(
+        constraints, after=args.get('cursor'), limit=limit + 1)
+    next_cursor = None
+    if len(packages) > limit:
+        packages = packages[:limit]
+        next_cursor = packages[-1]['name']
+
+    return jsonify({
+        'packages': [
+            {field: getter(package) for field, getter in getters}
+            for package in packages
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+def _is_string_list(value):
+    return (
+        isinstance(value, (list, tuple))
+        and all(isinstance(item, str) for item in value))
+
+
+def api_lookup():
+    """Look up packages by name or RPM, for a JSON list of names POSTed
+
+    The names can be source package names, or RPM names or NEVRAs
+    (see PackageIndex.find).
+    Instead of a list, the body can be an object with "names" and
+    optionally "fields" (see API_PACKAGE_FIELDS; the default is
+    API_LOOKUP_FIELDS).
+
+    Returns {"packages": {name: package}}, with null for unknown names.
+    """
+    data = current_app.config['data']
+    index = data['package_index']
+
+    names = request.get_json(silent=True)
+    fields = API_LOOKUP_FIELDS
+    if isinstance(names, dict):
+        fields = names.get('fields', fields)
+        names = names.get('names')
+    if not _is_string_list(names):
+        abort(400, 'expected a JSON list of names')
+    if len(names) > API_MAX_LOOKUP:
+        abort(400, 'at most {} names can be looked up'.format(API_MAX_LOOKUP))
+    if not _is_string_list(fields):
+        abort(400, 'fields must be a list of strings')
+    getters = _api_fields(fields)
+
+    results = {}
+    for name in names:
+        i = index.find(name)
+        if i is None:
+            results[name] = None
+        else:
+            package = index.packages[i]
+            results[name] = {
+                field: getter(package) for field, getter in getters
+            }
+    return jsonify({'packages': results})
+
+
+def _search_url(kind, name, package_name):
+    if kind == 'maintainer':
+        return url_for('maintainer', name=name)
+    return url_for('package', pkg=package_name)
+
+
+def _search_query():
+    query = request.args.get('q', '').strip()
+    if len(query) > SEARCH_MAX_QUERY:
+        abort(400, 'q must be at most {} characters'.format(SEARCH_MAX_QUERY))
+    return query
+
+
+def api_search():
+    """Return names of packages, RPMs and maintainers matching q, as JSON
+
+    This is used for autocompletion (see SearchIndex.search).
+    """
+    data = current_app.config['data']
+    limit = min(_int_arg('limit', SEARCH_SUGGESTIONS), SEARCH_RESULTS)
+    results = data['search_index'].search(_search_query(), limit)
+    return jsonify({
+        'results': [
+            {
+                'kind': kind,
+                'name': name,
+                'package': package_name,
+                'url': _search_url(kind, name, package_name),
+            }
+            for kind, name, package_name in results
+        ],
+    })
+
+
+def search():
+    data = current_app.config['data']
+    query = _search_query()
+    results = data['search_index'].search(query, SEARCH_RESULTS)
+
+    # Go straight to the page of an exact match, if there's only one
+    exact_urls = {
+        _search_url(*result) for result in results
+        if result[1].lower() == query.lower()
+    }
+    if len(exact_urls) == 1:
+        return redirect(exact_urls.pop())
+
+    return render_template(
+        'search.html',
+        breadcrumbs=(
+            (url_for('hello'), PAGE_NAME),
+            (url_for('search', q=query), 'Search'),
+        ),
+        search_query=query,
+        results=[
+            (
+                kind, name, data['packages'].get(package_name),
+                _search_url(kind, name, package_name),
+            )
+            for kind, name, package_name in results
+        ],
+        limit=SEARCH_RESULTS,
+    )
 
 
 def get_status_counts(pkgs):
@@ -126,8 +400,9 @@ def get_status_counts(pkgs):
 
 
 class TreeNode:
+    __slots__ = ('package', 'parent', 'kinds', 'children')
+
     def __init__(self, package, kinds=None, parent=None):
-        self.name = package['name']
         self.package = package
         self.parent = parent
         if kinds is None:
@@ -135,6 +410,10 @@ class TreeNode:
         self.kinds = kinds
         self.children = []
 
+    @property
+    def name(self):
+        return self.package['name']
+
     @property
     def path(self):
         if self.parent:
@@ -143,45 +422,59 @@ class TreeNode:
             return self.name
 
 
+# Number of dependency trees to remember. Trees are only read after they
+# are built, so they are shared between requests.
+DEPTREE_CACHE_SIZE = 1024
+
+
 def generate_deptree(package, **kwargs):
     [tree] = generate_deptrees([package], **kwargs)
     return tree.children
 
 
 def generate_deptrees(packages, keys=('deps', 'build_deps')):
-    nodes = [TreeNode(p, {'start'}) for p in packages]
+    data = current_app.config['data']
+    graph = data['graph']
+    return _generate_deptrees(
+        graph, data['fingerprint'],
+        tuple(graph.ids[p['name']] for p in packages), tuple(keys),
+    )
+
+
+@functools.lru_cache(maxsize=DEPTREE_CACHE_SIZE)
+def _generate_deptrees(graph, fingerprint, start_ids, keys):
+    # The fingerprint is part of the cache key: statuses, which determine
+    # the order of children, can change without the graph changing.
+    run_kind, build_kind = keys
+    nodes = [TreeNode(graph.packages[i], {'start'}) for i in start_ids]
     to_expand = deque(nodes)
     expanded = set()
     MAX_NODES = 500  # (reached by stuff like python2 itself)
     while to_expand and len(expanded) < MAX_NODES:
         node = to_expand.popleft()
-        pkg = node.package
-        packages = {
-            pkg['name']: pkg
-            for pkg in list(pkg[keys[0]].values()) + list(pkg[keys[1]].values())
-        }
-        children = sorted(
-            packages.values(),
-            key=status_sort_key,
+        i = graph.ids[node.name]
+        run_ids = set(graph.neighbors(run_kind, i))
+        build_ids = set(graph.neighbors(build_kind, i))
+        child_ids = sorted(
+            run_ids | build_ids,
+            key=lambda j: status_sort_key(graph.packages[j]),
         )
-        if not children:
+        if not child_ids:
             continue
-        run_names = set(pkg[keys[0]])
-        build_names = set(pkg[keys[1]])
         if node.name in expanded:
             node.kinds.add('elided')
             continue
         expanded.add(node.name)
-        for child in children:
-            child_node = TreeNode(child, parent=node)
+        for j in child_ids:
+            child_node = TreeNode(graph.packages[j], parent=node)
             if child_node.name in ('python27', 'python2.7'):
                 # Everything here depends on Python 2.
                 # Don't show it in the summary.
                 continue
             to_expand.append(child_node)
-            if child_node.name in run_names:
+            if j in run_ids:
                 child_node.kinds.add('run')
-            if child_node.name in build_names:
+            if j in build_ids:
                 child_node.kinds.add('build')
             node.children.append(child_node)
     while to_expand:
@@ -225,10 +518,9 @@ def group(grp):
     except KeyError:
         abort(404)
 
-    statuses = data['statuses']
-    status_summary = summarize_statuses(statuses, group['packages'].values())
+    status_summary = group['status_index'].summary
 
-    return render_template(
+    return stream_page(
         'group.html',
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
@@ -297,120 +589,290 @@ def graph(grp=None, pkg=None):
     if all_deps not in ('1', None):
         abort(400)  # Bad request
 
+    data = current_app.config['data']
+    breadcrumbs = [(url_for('hello'), PAGE_NAME)]
+    if grp is not None:
+        try:
+            group = data['groups'][grp]
+        except KeyError:
+            abort(404)
+        breadcrumbs.append((url_for('group', grp=grp), group['name']))
+        breadcrumbs.append((url_for('graph', grp=grp), 'Graph'))
+    elif pkg is not None:
+        try:
+            pkg = data['packages'][pkg]
+        except KeyError:
+            abort(404)
+        breadcrumbs.append((url_for('package', pkg=pkg['name']), pkg['name']))
+        breadcrumbs.append((url_for('graph', pkg=pkg['name']), 'Graph'))
+    else:
+        breadcrumbs.append((url_for('graph'), 'Graph'))
+
     return render_template(
         'graph.html',
-        breadcrumbs=(
-            (url_for('hello'), PAGE_NAME),
-            (url_for('graph'), 'Graph'),
-        ),
+        breadcrumbs=breadcrumbs,
         grp=grp,
         pkg=pkg,
         all_deps=all_deps,
+        ego_depth=EGO_GRAPH_DEPTH,
     )
 
 
-def graph_json(grp=None, pkg=None):
+# Number of dependency/dependent steps from a package to include in
+# the package's graph
+EGO_GRAPH_DEPTH = 2
+
+
+def _graph_response(data, ids=None, binary=False):
+    args = data['graph'], data['fingerprint'], ids
+    if binary:
+        return current_app.response_class(
+            _graph_binary_bytes(*args),
+            mimetype='application/octet-stream',
+        )
+    return current_app.response_class(
+        _graph_json_bytes(*args),
+        mimetype='application/json',
+    )
+
+
+def graph_json():
     data = current_app.config['data']
-    packages = data['packages']
+    return _graph_response(data)
+
 
-    # Get a list of all dependency relationships, as pairs of package names.
-    # Package names will be later used as nodes of several graphs.
-    link_pairs = [
-        (dep_name, pkg_name)
-        for pkg_name, pkg_dict in packages.items()
-        for attr in ('dependents', 'build_dependents')
-        for dep_name in pkg_dict[attr]
+def graph_binary():
+    """Graph of all linked packages, in the graph_format encoding"""
+    data = current_app.config['data']
+    return _graph_response(data, binary=True)
+
+
+def _group_graph_ids(data, grp):
+    try:
+        group = data['groups'][grp]
+    except KeyError:
+        abort(404)
+    dep_graph = data['graph']
+    return frozenset(dep_graph.ids[name] for name in group['packages'])
+
+
+def graph_json_grp(grp):
+    """Graph of a group's packages and the links between them"""
+    data = current_app.config['data']
+    return _graph_response(data, _group_graph_ids(data, grp))
+
+
+def graph_binary_grp(grp):
+    """Like graph_json_grp, in the graph_format encoding"""
+    data = current_app.config['data']
+    return _graph_response(data, _group_graph_ids(data, grp), binary=True)
+
+
+def _ego_graph_ids(data, pkg):
+    dep_graph = data['graph']
+    try:
+        start = dep_graph.ids[pkg]
+    except KeyError:
+        abort(404)
+    index = _graph_index(dep_graph, data['fingerprint'])
+    ids = {start}
+    boundary = [start]
+    for depth in range(EGO_GRAPH_DEPTH):
+        boundary = [
+            j for i in boundary for j in index.adjacent.get(i, ())
+            if j not in ids
+        ]
+        ids.update(boundary)
+    return frozenset(ids)
+
+
+def graph_json_pkg(pkg):
+    """Graph of packages near the given one, and the links between them"""
+    data = current_app.config['data']
+    return _graph_response(data, _ego_graph_ids(data, pkg))
+
+
+def graph_binary_pkg(pkg):
+    """Like graph_json_pkg, in the graph_format encoding"""
+    data = current_app.config['data']
+    return _graph_response(data, _ego_graph_ids(data, pkg), binary=True)
+
+
+def graph_tiers(dep_graph):
+    """Find dependency links and "tiers" of packages for the graph view
+
+    Returns (links, tiers). links is a list of (dependent, dependency)
+    pairs of package ids; links between two py3-only packages are left out.
+    tiers maps ids of the linked packages to their tier.
+
+    If the Python 2 dropping was done by removing all leaf packages at once,
+    a package's "tier" is how many of those removals would be needed to
+    drop it.
+    "Clusters" of packages that form cycles (strongly connected components)
+    are removed at once.
+    """
+    packages = dep_graph.packages
+    links = [
+        (j, i)
+        for i, pkg_dict in enumerate(packages)
+        for kind in ('dependents', 'build_dependents')
+        for j in dep_graph.neighbors(kind, i)
         if not all ([
             pkg_dict['status'] == 'py3-only',
-            packages[dep_name]['status'] == 'py3-only',
+            packages[j]['status'] == 'py3-only',
         ])
     ]
 
-    # Find "tiers" of packages: if the Python 2 dropping was done by removing
-    # all leaf packages at once, a package's "tier" is how many of those
-    # removals would be needed to drop it.
-    # "Clusters" of packages that form cycles are removed at once.
-
-    # For each such cluster, find some "representative" (rep) that will
-    # identify the cluster.
-    # (The rep will be the first node in the cluster, in alphabetical order.)
-    reps = {name: name for name in packages}
-
-    # Build a graph where all nodes are replaced by their representative
-    # (ignoring duplicate edges and self-loops)
-    graph = networkx.DiGraph()
-    graph.add_edges_from(set(
-        (reps[a], reps[b]) for a, b in link_pairs if reps[a] != reps[b]
-    ))
-
-    # For all cycles in this graph, replace all nodes in the cycle by a
-    # representative.
-    for cycle in networkx.cycles.simple_cycles(graph):
-        rep = min(reps[name] for name in cycle)
-        for name in cycle:
-            reps[name] = rep
-
-    # Build a graph whose nodes are the representatives (standing for clusters)
-    # (ignoring duplicate edges and self-loops)
-    cluster_graph = networkx.DiGraph()
-    cluster_graph.add_edges_from(set(
-        (reps[a], reps[b]) for a, b in link_pairs if reps[a] != reps[b]
-    ))
-
-    # Iteratively remove the cluster graph's leaves, keeping track of which
-    # iteration each node was removed in.
+    dependencies = [[] for p in packages]
+    for dependent, dependency in links:
+        dependencies[dependent].append(dependency)
+    component, members = strongly_connected_components(
+        len(packages), dependencies.__getitem__)
+
+    # Links between clusters (ignoring duplicates and links within clusters)
+    cluster_dependents = defaultdict(set)
+    linked_clusters = set()
+    for dependent, dependency in links:
+        a, b = component[dependent], component[dependency]
+        if a != b:
+            cluster_dependents[b].add(a)
+            linked_clusters.update((a, b))
+
+    # Clusters are numbered so that dependents come after dependencies.
+    # Go from the end, so that each cluster's dependents have their tiers
+    # already assigned: clusters nothing depends on are in tier 1, others
+    # are one tier above their highest dependent.
+    cluster_tiers = {}
+    for c in reversed(range(len(members))):
+        if c in linked_clusters:
+            cluster_tiers[c] = 1 + max(
+                (cluster_tiers[d] for d in cluster_dependents[c]),
+                default=0,
+            )
+
     tiers = {}
-    tier = 0
-    while cluster_graph.nodes:
-        tier += 1
-        leaves = [
-            n for n, d in cluster_graph.in_degree(cluster_graph.nodes)
-            if d == 0
-        ]
-        print(len(leaves), 'clusters in tier', tier)
-        if not leaves:
-            # Theoretically, we should have an acyclic graph here, so it
-            # should be possible to remove leaves until the graph is empty.
-            # However, the algorithm isn't quite right and a few common deps
-            # can be left over. Just put it in the last tier.
-            print(len(cluster_graph.nodes), 'clusters remaining')
-            for rep in cluster_graph.nodes:
-                tiers[rep] = tier
-            break
-        for rep in leaves:
-            if tier == 1 and packages[rep]['status'] in DONE_STATUSES:
-                # The first tier is separated into py3-only/legacy-leaf
-                # (tier=0) idle/blocked (tier=1) to make the outside of the
-                # graph look less crowded
-                tiers[rep] = 0
-            else:
-                tiers[rep] = tier
-        cluster_graph.remove_nodes_from(leaves)
+    for i in sorted({i for link in links for i in link}):
+        c = component[i]
+        tier = cluster_tiers.get(c, 0)
+        # The cluster's status is the status of its first package,
+        # in alphabetical order
+        rep = min(members[c], key=lambda j: dep_graph.names[j])
+        if tier == 1 and packages[rep]['status'] in DONE_STATUSES:
+            # The first tier is separated into py3-only/legacy-leaf
+            # (tier=0) idle/blocked (tier=1) to make the outside of the
+            # graph look less crowded
+            tier = 0
+        tiers[i] = tier
+    return links, tiers
+
+
+class GraphIndex:
+    """Links and tiers of graph_tiers, with an index of linked packages"""
+    def __init__(self, dep_graph):
+        self.links, self.tiers = graph_tiers(dep_graph)
+        self.adjacent = defaultdict(list)
+        for dependent, dependency in self.links:
+            self.adjacent[dependent].append(dependency)
+            self.adjacent[dependency].append(dependent)
+
+
+@functools.lru_cache(maxsize=2)
+def _graph_index(dep_graph, fingerprint):
+    """Return a GraphIndex, computed once per data version"""
+    return GraphIndex(dep_graph)
+
+
+_graph_layout_lock = threading.Lock()
+
+
+def _graph_layout(dep_graph, fingerprint):
+    """Return {id: (x, y)} for all linked packages (see force_layout)
+
+    This is computed once per data version; subgraphs reuse it.
+    It takes seconds for the whole collection, so create_app computes
+    it before serving, and concurrent requests after the data changes
+    wait for one computation rather than each doing their own.
+    """
+    with _graph_layout_lock:
+        return _compute_graph_layout(dep_graph, fingerprint)
+
+
+@functools.lru_cache(maxsize=2)
+def _compute_graph_layout(dep_graph, fingerprint):
+    index = _graph_index(dep_graph, fingerprint)
+    ids = sorted(index.tiers)
+    node_indices = {i: n for n, i in enumerate(ids)}
+    links = [
+        (node_indices[src], node_indices[target])
+        for src, target in index.links
+    ]
+    positions = force_layout([index.tiers[i] for i in ids], links)
+    return dict(zip(ids, positions))
 
-    # Having found the tier numbers, abandon cluster_graph.
-    # Convert a new, full graph (from link_pairs) for use in JS.
+
+@functools.lru_cache(maxsize=64)
+def _graph_view(dep_graph, fingerprint, ids=None):
+    """Return (nodes, links) for the graph view
+
+    If ids is None, the graph has all linked packages.
+    Otherwise, it has the given packages and the links between them.
+    Nodes are dicts; they have x and y coordinates from the layout of
+    the whole graph (see _graph_layout and sublayout).
+    Links are (source, target) pairs of indices into nodes.
+    """
+    index = _graph_index(dep_graph, fingerprint)
+    layout = _graph_layout(dep_graph, fingerprint)
+    if ids is None:
+        links = index.links
+        positions = [layout[i] for i in sorted(index.tiers)]
+        ids = index.tiers
+    else:
+        positions = sublayout([layout.get(i) for i in sorted(ids)])
+        links = [
+            (src, target) for src, target in index.links
+            if src in ids and target in ids
+        ]
     nodes = []
     node_indices = {}
-    for i, node in enumerate(set(node for pair in link_pairs for node in pair)):
-        node_indices[node] = i
-        tier = tiers.get(reps[node], 0)
-        pkg = packages[node]
-        color = pkg['status_obj']['color']
+    for i in sorted(ids):
+        tier = index.tiers.get(i, 0)
+        node_indices[i] = len(nodes)
+        pkg = dep_graph.packages[i]
         nodes.append({
-            'name': node,
+            'name': pkg['name'],
             'color': graph_color(pkg['status_obj']['color'], tier),
             'status_color': '#' + pkg['status_obj']['color'],
             'tier': tier,
         })
+    links = [
+        (node_indices[src], node_indices[target]) for src, target in links
+    ]
+    for node, (x, y) in zip(nodes, positions):
+        node['x'] = x
+        node['y'] = y
+    return nodes, links
+
+
+@functools.lru_cache(maxsize=256)
+def _graph_json_bytes(dep_graph, fingerprint, ids=None):
+    """Return JSON for the graph view (see _graph_view)"""
+    nodes, links = _graph_view(dep_graph, fingerprint, ids)
     links = [
         {
-            "source": node_indices[src],
-            "target": node_indices[target],
+            "source": src,
+            "target": target,
         }
-        for src, target in link_pairs
+        for src, target in links
     ]
+    return json.dumps(
+        {'nodes': nodes, 'links': links}, separators=(',', ':'),
+    ).encode()
 
-    return jsonify(nodes=nodes, links=links)
+
+@functools.lru_cache(maxsize=256)
+def _graph_binary_bytes(dep_graph, fingerprint, ids=None):
+    """Return the graph view (see _graph_view) in the graph_format encoding"""
+    return encode_graph(*_graph_view(dep_graph, fingerprint, ids))
 
 
 def graph_color(color, depth):
@@ -425,62 +887,83 @@ def graph_color(color, depth):
                          for x in (0, 2, 4))
 
 
-def _piechart(status_summary, bg=None):
+def render_piechart(jinja_env, status_summary, bg=None):
+    """Return a SVG piechart of a status summary, as bytes"""
     total_pkg_count = sum(c for s, c in status_summary)
-    resp = make_response(render_template(
-        'piechart.svg',
+    return jinja_env.get_template('piechart.svg').render(
         status_summary=status_summary,
         total_pkg_count=total_pkg_count or 1,
         sin=math.sin, cos=math.cos, tau=tau,
         bg=bg,
-    ))
-    resp.headers['Content-type'] = 'image/svg+xml'
-    return resp
+    ).encode('utf-8')
 
 
-def status_svg(status):
-    data = current_app.config['data']
-    try:
-        status = data['statuses'][status]
-    except KeyError:
-        abort(404)
+def render_piecharts(jinja_env, data):
+    """Return all the SVG piecharts
 
-    return _piechart([], status)
+    The result is a dict with keys 'all', 'naming', ('group', ident)
+    and ('status', ident), and SVG bytes as values.
+    """
+    piecharts = {
+        'all': render_piechart(jinja_env, data['status_index'].summary),
+        'naming': render_piechart(jinja_env, get_naming_policy_info(data)),
+    }
+    for ident, group in data['groups'].items():
+        piecharts['group', ident] = render_piechart(
+            jinja_env, group['status_index'].summary)
+    for ident, status in data['statuses'].items():
+        piecharts['status', ident] = render_piechart(jinja_env, [], status)
+    return piecharts
 
 
-def piechart_svg():
-    data = current_app.config['data']
-    statuses = data['statuses']
-    packages = data['packages']
+def _current_piecharts():
+    """Return the piecharts for the current data
 
-    status_summary = summarize_statuses(statuses, packages.values())
+    They are rendered again when the data has changed since the last
+    rendering (see update_packages).
+    """
+    data = current_app.config['data']
+    fingerprint, piecharts = current_app.config['piecharts']
+    if fingerprint != data['fingerprint']:
+        fingerprint = data['fingerprint']
+        piecharts = render_piecharts(current_app.jinja_env, data)
+        current_app.config['piecharts'] = fingerprint, piecharts
+    return piecharts
 
-    return _piechart(status_summary)
 
+def _cache_tag(data):
+    """Return the tag for URLs of resources that only change with the data
+    """
+    return data['fingerprint'][:16]
 
-def piechart_grp(grp):
-    data = current_app.config['data']
-    statuses = data['statuses']
 
+def _piechart(key):
     try:
-        group = data['groups'][grp]
+        svg = _current_piecharts()[key]
     except KeyError:
         abort(404)
+    return current_app.response_class(svg, content_type='image/svg+xml')
+
+
+def status_svg(status):
+    return _piechart(('status', status))
+
+
+def piechart_svg():
+    return _piechart('all')
 
-    status_summary = summarize_statuses(statuses, group['packages'].values())
 
-    return _piechart(status_summary)
+def piechart_grp(grp):
+    return _piechart(('group', grp))
 
 
 def howto():
     data = current_app.config['data']
     statuses = data['statuses']
-    packages = data['packages']
-
-    by_status = group_by_status(packages.values())
+    index = data['status_index']
 
-    if by_status['mispackaged']:
-         random_mispackaged = random.choice(by_status['mispackaged'])
+    if index.count('mispackaged'):
+         random_mispackaged = random.choice(index.packages('mispackaged'))
     else:
          random_mispackaged = None
 
@@ -490,29 +973,35 @@ def howto():
             (url_for('hello'), PAGE_NAME),
             (url_for('howto'), 'So you want to contribute?'),
         ),
-        idle_len=len(by_status['idle']),
-        blocked_len=len(by_status['blocked']),
-        mispackaged=len(by_status['mispackaged']),
-        by_status=by_status,
+        idle_len=index.count('idle'),
+        blocked_len=index.count('blocked'),
+        mispackaged=index.count('mispackaged'),
+        by_status=index.by_status,
         statuses=statuses,
         random_mispackaged=None,
-        random_idle=random.choice(by_status['idle']),
+        random_idle=random.choice(index.packages('idle')),
     )
 
 
+@functools.lru_cache(maxsize=8)
+def _history_figure(history, fingerprint, statuses_key, **options):
+    """Return history_graph's figure JSON, computed once per data version"""
+    data = current_app.config['data']
+    return history_graph(history, data[statuses_key], **options)
+
+
 def history(expand=False):
     data = current_app.config['data']
 
-    graph = history_graph(
-        entries=data['history'],
-        statuses=data['statuses'],
+    figure = _history_figure(
+        data['history'], data['fingerprint'], 'statuses',
         title='portingdb history',
         expand=bool(expand),
     )
 
     return render_template(
         'history.html',
-        graph=graph,
+        figure=figure,
         expand=bool(expand),
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
@@ -526,11 +1015,12 @@ def mispackaged():
     # but left for URL stability.
     data = current_app.config['data']
 
-    mispackaged = [p for p in data['packages'].values()
-                   if p['status'] == 'mispackaged']
-    mispackaged.sort(key=last_link_update_sort_key)
+    mispackaged = sorted(
+        data['status_index'].packages('mispackaged'),
+        key=last_link_update_sort_key,
+    )
 
-    return render_template(
+    return stream_page(
         'mispackaged.html',
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
@@ -562,7 +1052,7 @@ def namingpolicy():
         for name, pkgs in data['non_python_unversioned_requires'].items()
     }
 
-    return render_template(
+    return stream_page(
         'namingpolicy.html',
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
@@ -598,24 +1088,21 @@ def get_naming_policy_info(data):
 
 
 def piechart_namingpolicy():
-    data = current_app.config['data']
-    summary = get_naming_policy_info(data)
-    return _piechart(summary)
+    return _piechart('naming')
 
 
 def history_naming():
     data = current_app.config['data']
 
-    graph = history_graph(
-        entries=data['history-naming'],
-        statuses=data['naming'],
+    figure = _history_figure(
+        data['history-naming'], data['fingerprint'], 'naming',
         title='portingdb naming history',
         show_percent=False,
     )
 
     return render_template(
         'history-naming.html',
-        graph=graph,
+        figure=figure,
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
             (url_for('namingpolicy'), 'Naming Policy'),
@@ -624,6 +1111,27 @@ def history_naming():
     )
 
 
+@functools.lru_cache(maxsize=1)
+def _plotly_js_bytes():
+    return plotly_js()
+
+
+def plotly_js_view():
+    """Serve plotly.js
+
+    The URL is versioned (see the plotly_version template global),
+    so the bundle can be cached by clients for a long time.
+    """
+    # text/javascript is what mimetypes guesses for .js, which
+    # Frozen-Flask checks when freezing the site
+    response = current_app.response_class(
+        _plotly_js_bytes(), mimetype='text/javascript')
+    response.set_etag(PLOTLY_VERSION)
+    response.cache_control.public = True
+    response.cache_control.max_age = VERSIONED_MAX_AGE
+    return response.make_conditional(request)
+
+
 def maintainer(name):
     data = current_app.config['data']
     try:
@@ -643,6 +1151,7 @@ def maintainer(name):
         'maintainer.html',
         maintainer=maintainer,
         comaintainers=comaintainers,
+        status_summary=maintainer['status_index'].summary,
         breadcrumbs=(
             (url_for('hello'), PAGE_NAME),
             (url_for('maintainer', name=name), name),
@@ -697,10 +1206,223 @@ assert split_digits(73.98) == ['74', '0']
 assert split_digits(-8.5) == ['-8', '5']
 
 
-def create_app(directories, cache_config=None):
+def make_cache_region(cache_config):
+    """Return a dogpile.cache region configured from a config dict
+
+    The dict has the arguments of CacheRegion.configure(), for example:
+    {"backend": "dogpile.cache.memory"} or, for Redis,
+    {"backend": "dogpile.cache.redis", "expiration_time": 3600,
+     "arguments": {"host": ..., "port": ..., "db": 0}}.
+    """
+    from dogpile.cache import make_region
+
+    return make_region().configure(**cache_config)
+
+
+def cached_view(region, func, cache_args=()):
+    """Wrap a view function to serve its responses from a cache region
+
+    Responses are cached by the loaded data, URL path and the values of
+    the request arguments named in cache_args. (Other arguments, like the
+    cache-busting tags in image URLs, don't change the response.)
+    """
+    @functools.wraps(func)
+    def wrapper(**kwargs):
+        key = _request_cache_key(cache_args)
+
+        def render():
+            response = current_app.make_response(func(**kwargs))
+            return (
+                response.status_code,
+                list(response.headers.items()),
+                response.get_data(),
+            )
+
+        status, headers, body = region.get_or_create(key, render)
+        return current_app.response_class(
+            body, status=status, headers=headers)
+
+    return wrapper
+
+
+def _request_cache_key(cache_args):
+    """Return a cache key for the current request
+
+    The key has the data's fingerprint, the URL path and the values of
+    the request arguments named in cache_args.
+    The fingerprint is read for each request, since it changes when
+    the data is updated in place (see update_packages).
+    """
+    key = 'portingdb:{}:{}'.format(
+        current_app.config['data']['fingerprint'], request.path)
+    args = [(name, request.args.get(name)) for name in cache_args]
+    if args:
+        key += '?' + urllib.parse.urlencode(
+            [(name, value) for name, value in args if value is not None])
+    return key
+
+
+def _gzip(body):
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+# Content codings for precompressed responses, in order of preference
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS['br'] = brotli.compress
+ENCODERS['gzip'] = _gzip
+
+
+class PrecompressedStore:
+    """LRU store of rendered responses, kept in compressed form
+
+    Each response is encoded once with each of ENCODERS.
+    Only the encoded bodies are kept; the rare client that doesn't accept
+    gzip gets a body decompressed on the fly.
+    Responses smaller than PRECOMPRESSED_MIN_SIZE are kept as they are.
+    """
+    def __init__(self, maxsize=PRECOMPRESSED_STORE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (status, headers, {coding: body}), or None if not stored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def add(self, key, status, headers, body):
+        """Encode and store a response; return the entry as get() would"""
+        headers = [
+            (name, value) for name, value in headers
+            if name.lower() != 'content-length'
+        ]
+        if len(body) < PRECOMPRESSED_MIN_SIZE or status != 200:
+            bodies = {'identity': body}
+        else:
+            bodies = {
+                coding: encode(body) for coding, encode in ENCODERS.items()
+            }
+        entry = status, headers, bodies
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+
+def _stream_into_store(store, key, response):
+    chunks = []
+    for chunk in response.iter_encoded():
+        chunks.append(chunk)
+        yield chunk
+    store.add(
+        key, response.status_code, list(response.headers.items()),
+        b''.join(chunks))
+
+
+def negotiate_encoding(codings):
+    """Return the best of given content codings for the current request
+
+    Return 'identity' if the client doesn't accept any of them.
+    """
+    return request.accept_encodings.best_match(codings, default='identity')
+
+
+def precompressed_view(store, func, cache_args=()):
+    """Wrap a view function to serve its responses from a PrecompressedStore
+
+    Responses are keyed like in cached_view, and encoded according
+    to the request's Accept-Encoding.
+    A streamed response is passed through (uncompressed) the first time,
+    and stored when it's complete.
+    """
+    @functools.wraps(func)
+    def wrapper(**kwargs):
+        key = _request_cache_key(cache_args)
+        entry = store.get(key)
+        if entry is None:
+            response = current_app.make_response(func(**kwargs))
+            headers = list(response.headers.items())
+            if response.is_streamed:
+                response = current_app.response_class(
+                    _stream_into_store(store, key, response),
+                    status=response.status_code, headers=headers)
+                response.vary.add('Accept-Encoding')
+                return response
+            entry = store.add(
+                key, response.status_code, headers, response.get_data())
+        status, headers, bodies = entry
+        coding = negotiate_encoding(list(bodies))
+        if coding in bodies:
+            body = bodies[coding]
+        else:
+            body = gzip.decompress(bodies['gzip'])
+        response = current_app.response_class(
+            body, status=status, headers=headers)
+        if coding != 'identity':
+            response.content_encoding = coding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    return wrapper
+
+
+def response_etag(fingerprint, coding=None):
+    """Return a strong ETag for the current request's response
+
+    Responses only depend on the data (identified by its fingerprint),
+    the URL path and the query arguments -- and the content coding
+    (see PrecompressedStore), which is given as coding.
+    """
+    hasher = hashlib.sha256(fingerprint.encode())
+    hasher.update(request.full_path.encode())
+    if coding and coding != 'identity':
+        hasher.update(b'\0' + coding.encode())
+    return hasher.hexdigest()[:32]
+
+
+def _view_args_exist(data, view_args):
+    """Return whether the packages, groups etc. named in a URL exist"""
+    collections = {
+        'pkg': data['packages'],
+        'grp': data['groups'],
+        'name': data['maintainers'],
+        'status': data['statuses'],
+    }
+    return all(
+        value in collections[key]
+        for key, value in view_args.items()
+        if key in collections
+    )
+
+
+def create_app(directories, cache_config=None, frozen=False, **load_options):
+    """Create the Flask application
+
+    If cache_config is given, it's used to configure a dogpile.cache region
+    (see make_cache_region) where rendered responses are cached.
+
+    If frozen is true, the app is for freezing into a static site
+    (see elsasite.py). Endpoints that only make sense with a server,
+    like the query API and search, are left out, and pages aren't
+    streamed (see stream_page).
+
+    Responses have ETag and Last-Modified headers based on the data, and
+    conditional requests are answered with 304 Not Modified without
+    rendering anything.
+    """
     app = Flask(__name__)
-    app.config['data'] = data = get_data('data/')
+    app.config['data'] = data = get_data(*directories, **load_options)
+    if cache_config:
+        region = make_cache_region(cache_config)
+    else:
+        region = None
     app.config['CONFIG'] = data['config']
+    app.config['frozen'] = frozen
     app.jinja_env.undefined = StrictUndefined
     app.jinja_env.filters['md'] = markdown_filter
     app.jinja_env.filters['format_rpm_name'] = format_rpm_name
@@ -712,40 +1434,137 @@ def create_app(directories, cache_config=None):
     app.jinja_env.filters['summarize_statuses'] = (
         lambda p: summarize_statuses(data['statuses'], p))
 
+    app.config['piecharts'] = (
+        data['fingerprint'], render_piecharts(app.jinja_env, data))
+    # Lay out the graph now rather than in the first request for it
+    _graph_layout(data['graph'], data['fingerprint'])
+
+    def is_data_view():
+        return (
+            request.method in ('GET', 'HEAD')
+            and request.endpoint not in (None, 'static', 'plotly_js'))
+
+    @app.before_request
+    def check_not_modified():
+        if not is_data_view():
+            return None
+        if not _view_args_exist(data, request.view_args or {}):
+            # Let the view answer with 404
+            return None
+        if request.args and request.query_string.decode() != _cache_tag(data):
+            # Let the view check its arguments first (and maybe answer
+            # with 400); add_validators answers 304 after that
+            return None
+        etags = [response_etag(data['fingerprint'])]
+        if request.endpoint in precompressed_endpoints:
+            etags.append(response_etag(
+                data['fingerprint'], negotiate_encoding(list(ENCODERS))))
+        if request.if_none_match:
+            matching = [
+                etag for etag in etags if request.if_none_match.contains(etag)]
+            not_modified = bool(matching)
+        elif request.if_modified_since:
+            matching = etags[-1:]
+            not_modified = request.if_modified_since >= data['last_modified']
+        else:
+            not_modified = False
+        if not_modified:
+            response = app.response_class(status=304)
+            response.set_etag(matching[0])
+            if request.endpoint in precompressed_endpoints:
+                response.vary.add('Accept-Encoding')
+            return add_validators(response)
+        return None
+
+    @app.after_request
+    def add_validators(response):
+        if is_data_view() and response.status_code in (200, 304):
+            if 'ETag' not in response.headers:
+                response.set_etag(response_etag(
+                    data['fingerprint'], response.content_encoding))
+            response.last_modified = data['last_modified']
+            if request.query_string.decode() == _cache_tag(data):
+                # The URL changes with the data (see _cache_tag)
+                response.cache_control.public = True
+                response.cache_control.max_age = VERSIONED_MAX_AGE
+            else:
+                # Let clients cache, but check with us whether data changed
+                response.cache_control.no_cache = True
+                if request.args and response.status_code == 200:
+                    # Skipped in check_not_modified
+                    response.make_conditional(request)
+        return response
+
     @app.context_processor
     def add_template_globals():
         return {
-            'cache_tag': uuid.uuid4(),
+            'cache_tag': _cache_tag(data),
             'len': len,
+            'plotly_version': PLOTLY_VERSION,
+            # Search needs a server
+            'search_enabled': not frozen,
             'log': math.log,
             'config': app.config['CONFIG'],
             'now': datetime.datetime.utcnow(),
         }
 
-    def _add_route(url, func, **kwargs):
-        app.route(url, **kwargs)(func)
-
-    _add_route("/", hello)
+    precompressed_store = PrecompressedStore()
+    precompressed_endpoints = set()
+    wrapped_views = {}
+
+    def _add_route(url, func, cache_args=(), precompress=False, cache=True,
+                   **kwargs):
+        if func not in wrapped_views:
+            view = func
+            if region is not None and cache:
+                view = cached_view(region, view, cache_args)
+            if precompress:
+                view = precompressed_view(
+                    precompressed_store, view, cache_args)
+                precompressed_endpoints.add(func.__name__)
+            wrapped_views[func] = view
+        app.route(url, **kwargs)(wrapped_views[func])
+
+    _add_route("/", hello, precompress=True)
     _add_route("/stats.json", jsonstats)
+    if not frozen:
+        # Each query string would get its own cache entry, and answering
+        # from the indexes is cheap anyway, so these aren't cached
+        _add_route("/api/packages", api_packages, cache=False)
+        _add_route("/api/search", api_search, cache=False)
+        _add_route("/search/", search, cache=False)
+    # Responses depend on the request body, so they aren't cached
+    app.route("/api/lookup", methods=['POST'])(api_lookup)
     _add_route("/pkg/<pkg>/", package)
-    _add_route("/grp/<grp>/", group)
-    _add_route("/graph/", graph)
-    _add_route("/graph/portingdb.json", graph_json)
+    _add_route("/grp/<grp>/", group, precompress=True)
+    _add_route("/graph/", graph, cache_args=('all_deps', ))
+    _add_route("/graph/portingdb.json", graph_json, precompress=True)
+    _add_route("/graph/portingdb.bin", graph_binary, precompress=True)
+    _add_route("/grp/<grp>/graph/", graph, cache_args=('all_deps', ))
+    _add_route("/grp/<grp>/graph.json", graph_json_grp, precompress=True)
+    _add_route("/grp/<grp>/graph.bin", graph_binary_grp, precompress=True)
+    _add_route("/pkg/<pkg>/graph/", graph, cache_args=('all_deps', ))
+    _add_route("/pkg/<pkg>/graph.json", graph_json_pkg, precompress=True)
+    _add_route("/pkg/<pkg>/graph.bin", graph_binary_pkg, precompress=True)
     _add_route("/piechart.svg", piechart_svg)
     _add_route("/status/<status>.svg", status_svg)
     _add_route("/grp/<grp>/piechart.svg", piechart_grp)
-    _add_route("/mispackaged/", mispackaged)
-    _add_route("/namingpolicy/", namingpolicy)
+    _add_route("/mispackaged/", mispackaged, precompress=True)
+    _add_route("/namingpolicy/", namingpolicy, precompress=True)
     _add_route("/namingpolicy/piechart.svg", piechart_namingpolicy)
-    _add_route("/namingpolicy/history/", history_naming)
-    _add_route("/history/", history, defaults={'expand': False})
-    _add_route("/history/expanded/", history, defaults={'expand': True})
+    _add_route("/namingpolicy/history/", history_naming, precompress=True)
+    _add_route("/history/", history, precompress=True,
+               defaults={'expand': False})
+    _add_route("/history/expanded/", history, precompress=True,
+               defaults={'expand': True})
     _add_route("/howto/", howto)
+    app.route("/plotly.js", endpoint='plotly_js')(plotly_js_view)
     _add_route("/maintainer/<name>/", maintainer)
 
     return app
 
 
-def main(directories, cache_config=None, debug=False, port=5000):
-    app = create_app(directories)
+def main(directories, cache_config=None, debug=False, port=5000,
+         **load_options):
+    app = create_app(directories, cache_config=cache_config, **load_options)
     app.run(debug=debug, port=port)
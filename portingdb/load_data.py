@@ -1,12 +1,27 @@
 import os
+import re
 import json
 import datetime
 import sys
 import csv
+import hashlib
+import pickle
+import tempfile
+import functools
+import copy
+import contextlib
+import concurrent.futures
+import time
+import tracemalloc
 
 import yaml
 import click
 
+import portingdb.model
+from portingdb.model import Package, Rpm, Bug, DepGraph, Reachability, EMPTY
+from portingdb.model import MaintainerIndex, PackageMaintainers, History
+from portingdb.model import StatusIndex, PackageIndex, SearchIndex
+
 
 PY2_STATUSES = {'released', 'legacy-leaf', 'py3-only'}
 DONE_STATUSES = PY2_STATUSES | {'dropped'}
@@ -15,35 +30,338 @@ DONE_STATUSES = PY2_STATUSES | {'dropped'}
 # Update to the Rawhide version after a mass rebuild.
 CURRENT_FEDORA = 31
 
+# Bump this when the structure of loaded data changes in a way that
+# makes existing snapshots unusable.
+SNAPSHOT_VERSION = 5
+
 try:
     SafeLoader = yaml.CSafeLoader
 except AttributeError:
     SafeLoader = yaml.SafeLoader
 
 
-def get_data(*directories, engine=None):
+def get_data(*directories, engine=None, snapshot_dir=None, parallel=False):
+    """Load and post-process data from the given directories
+
+    If snapshot_dir is given, the fully processed data is cached there,
+    and reused while none of the input files change.
+
+    If parallel is true, input files are decoded in several processes.
+    """
     data = {}
     if any(directories):
-        load_from_directories(data, directories)
+        fingerprint = data_fingerprint(directories)
+        if snapshot_dir:
+            snapshot = load_snapshot(snapshot_dir, directories, fingerprint)
+            if snapshot is not None:
+                return snapshot
+        load_from_directories(data, directories, parallel=parallel)
+        data['fingerprint'] = fingerprint
+        data['last_modified'] = data_last_modified(directories)
+        if snapshot_dir:
+            save_snapshot(snapshot_dir, directories, fingerprint, data)
     return data
 
 
-def data_from_file(directories, basename):
+def find_file(directories, basename, extensions=('.yaml', '.json')):
     for directory in directories:
-        for ext in '.yaml', '.json':
+        for ext in extensions:
             filename = os.path.join(directory, basename + ext)
             if os.path.exists(filename):
-                return decode_file(filename)
+                return filename
     raise FileNotFoundError(filename)
 
 
+def data_from_file(directories, basename):
+    return decode_file(find_file(directories, basename))
+
+
 def data_from_csv(directories, basename):
+    filename = find_file(directories, basename, extensions=('.csv', ))
+    with open(filename) as f:
+        return(list(csv.DictReader(f)))
+
+
+def history_from_csv(directories, basename):
+    filename = find_file(directories, basename, extensions=('.csv', ))
+    with open(filename) as f:
+        return History(csv.DictReader(f))
+
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class _JSONObjectReader:
+    """Incrementally decode a JSON object from a file, one value at a time"""
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        # json.load() shares equal object keys within a document;
+        # do the same across the individually decoded values.
+        keys = {}
+        self.decoder = json.JSONDecoder(object_pairs_hook=lambda pairs: {
+            keys.setdefault(k, k): v for k, v in pairs
+        })
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self):
+        """Read more of the file into the buffer; return False at EOF"""
+        # Read at least as much as is buffered, so that re-decoding
+        # a large value doesn't become quadratic
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        """Skip whitespace; return the next character, or None at EOF"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def peek(self):
+        """Skip whitespace and return the next character"""
+        char = self._skip_whitespace()
+        if char is None:
+            raise ValueError('{}: unexpected end of JSON data'.format(
+                self.f.name))
+        return char
+
+    def expect_end(self):
+        """Check that there's nothing but whitespace left"""
+        char = self._skip_whitespace()
+        if char is not None:
+            raise ValueError('{}: extra data after JSON object: {!r}'.format(
+                self.f.name, char))
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, which is one of chars"""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError('{}: expected {!r}, got {!r}'.format(
+                self.f.name, chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode and consume the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError('{}: {}'.format(self.f.name, e)) from e
+            if end == len(self.buf) and self._fill():
+                # A number might be cut off at the end of the buffer
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(filename, chunk_size=1 << 16):
+    """Yield (key, value) pairs of the JSON object in the given file
+
+    Values are decoded one at a time, so neither the whole file nor
+    the whole decoded object needs to be in memory at once.
+    Invalid JSON raises ValueError -- possibly after some items were
+    yielded, but each yielded value is complete.
+    """
+    with open(filename) as f:
+        reader = _JSONObjectReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.pos += 1
+        else:
+            while True:
+                if reader.peek() != '"':
+                    raise ValueError('{}: expected a string key, got {!r}'
+                                     .format(filename, reader.peek()))
+                key = reader.value()
+                reader.expect(':')
+                yield key, reader.value()
+                if reader.expect(',}') == '}':
+                    break
+        reader.expect_end()
+
+
+def iter_collection(directories, basename):
+    """Yield (name, package) pairs from a collection file"""
+    filename = find_file(directories, basename)
+    if filename.endswith('.json'):
+        return iter_json_items(filename)
+    else:
+        return decode_file(filename).items()
+
+
+def read_package_owners(filename):
+    """Return {package name: maintainer names} for RPMs from an owner file
+
+    The file is pagure_owner_alias.json from src.fedoraproject.org.
+    Only its "rpms" namespace is kept.
+    """
+    if filename.endswith('.json'):
+        for namespace, owners in iter_json_items(filename):
+            if namespace == 'rpms':
+                return owners
+        return {}
+    else:
+        return decode_file(filename).get('rpms', {})
+
+
+def input_files(directories):
+    """Return names of all files load_from_directories reads"""
+    config = data_from_file(directories, 'config')
+    collection_name = config.get('collection', 'fedora')
+    filenames = [
+        find_file(directories, basename)
+        for basename in (
+            'config', 'statuses', 'naming', 'groups', 'pagure_owner_alias',
+            collection_name, collection_name + '-update',
+        )
+    ]
+    for basename in 'history', 'history-naming':
+        filenames.append(find_file(directories, basename, ('.csv', )))
+    return filenames
+
+
+def _fingerprint_files(directories):
+    """Return names of the input files and of the loader and model code"""
+    code_files = [__file__, portingdb.model.__file__]
+    return input_files(directories) + code_files
+
+
+def data_last_modified(directories):
+    """Return the modification time of the newest file the data depends on
+
+    These are the same files data_fingerprint covers.
+    The result is a timezone-aware datetime in UTC, in whole seconds
+    (as used in HTTP headers).
+    """
+    mtime = max(os.stat(f).st_mtime for f in _fingerprint_files(directories))
+    return datetime.datetime.fromtimestamp(
+        int(mtime), tz=datetime.timezone.utc)
+
+
+def data_fingerprint(directories):
+    """Return a hex digest identifying the data in the given directories
+
+    The digest covers the path, size, mtime and contents of each input file,
+    and of the loader and model code, so it changes whenever reloading
+    could give a different result, or a snapshot could hold objects
+    of outdated classes.
+    """
+    hasher = hashlib.sha256()
+    hasher.update('snapshot-{}'.format(SNAPSHOT_VERSION).encode())
+    for filename in _fingerprint_files(directories):
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        hasher.update('\0{}\0{}\0{}\0'.format(
+            filename, stat.st_size, stat.st_mtime_ns).encode())
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# Packages reference each other (deps, dependents, ...), forming chains
+# far longer than pickle's recursion limit allows.
+# Snapshots store each package's contents separately, and references
+# to packages by name.
+# The dict of all packages is referenced as _ALL_PACKAGES.
+_ALL_PACKAGES = ('all packages', )
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file, packages):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._package_names = {id(p): name for name, p in packages.items()}
+        self._package_names[id(packages)] = _ALL_PACKAGES
+
+    def persistent_id(self, obj):
+        return self._package_names.get(id(obj))
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, packages):
+        super().__init__(file)
+        self._packages = packages
+
+    def persistent_load(self, name):
+        if name == _ALL_PACKAGES:
+            return self._packages
+        return self._packages[name]
+
+
+def _snapshot_prefix(directories):
+    """Return the start of names of snapshots of the given directories
+
+    Apps that load different directories can share a snapshot_dir
+    without replacing each other's snapshots.
+    """
+    hasher = hashlib.sha256()
     for directory in directories:
-        filename = os.path.join(directory, basename + '.csv')
-        if os.path.exists(filename):
-            with open(filename) as f:
-                return(list(csv.DictReader(f)))
-    raise FileNotFoundError(filename)
+        hasher.update(os.path.abspath(directory).encode() + b'\0')
+    return 'portingdb-{}-'.format(hasher.hexdigest()[:16])
+
+
+def _snapshot_filename(snapshot_dir, directories, fingerprint):
+    return os.path.join(
+        snapshot_dir,
+        '{}{}.pickle'.format(_snapshot_prefix(directories), fingerprint))
+
+
+def load_snapshot(snapshot_dir, directories, fingerprint):
+    """Return data saved by save_snapshot, or None if there's no snapshot"""
+    try:
+        f = open(
+            _snapshot_filename(snapshot_dir, directories, fingerprint), 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        names = pickle.load(f)
+        packages = {name: Package() for name in names}
+        contents, data = _SnapshotUnpickler(f, packages).load()
+    for name, package in packages.items():
+        package.__setstate__(contents[name])
+    data['packages'] = packages
+    return data
+
+
+def save_snapshot(snapshot_dir, directories, fingerprint, data):
+    """Save processed data to snapshot_dir
+
+    Older snapshots of the same directories are removed.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    packages = data['packages']
+    rest = {k: v for k, v in data.items() if k != 'packages'}
+    contents = {
+        name: package.__getstate__() for name, package in packages.items()
+    }
+    filename = _snapshot_filename(snapshot_dir, directories, fingerprint)
+    fd, tmp_filename = tempfile.mkstemp(dir=snapshot_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(list(packages), f, protocol=pickle.HIGHEST_PROTOCOL)
+            _SnapshotPickler(f, packages).dump((contents, rest))
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+    prefix = _snapshot_prefix(directories)
+    for old in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, old)
+        if (old.startswith(prefix) and old.endswith('.pickle')
+                and path != filename):
+            os.unlink(path)
 
 
 def decode_file(filename):
@@ -84,249 +402,618 @@ def _merge_updates(base, updates, warnings=None, parent_keys=()):
             base[key] = new_value
 
 
-def load_from_directories(data, directories):
-    config = data.setdefault('config', {})
-    config.update(data_from_file(directories, 'config'))
+def _consolidate_non_python_requirers(package):
+    # fedora.json contains non_python_requirers data for each RPM.
+    # Replace it by a summary for the whole component.
+    nonpy_requirers = {}
+    rpms = package.get('rpms')
+    if isinstance(rpms, dict):
+        for rpm in rpms.values():
+            for kind, names in rpm.pop('non_python_requirers', {}).items():
+                if names:
+                    nonpy_requirers.setdefault(kind, set()).update(names)
+    package['non_python_requirers'] = nonpy_requirers
 
-    statuses = data.setdefault('statuses', {})
-    statuses.update({s['ident']: s
-                     for s in data_from_file(directories, 'statuses')})
 
-    naming_statuses = data.setdefault('naming_statuses', {})
-    naming_statuses.update({s['ident']: s
-                           for s in data_from_file(directories, 'naming')})
+def _make_package(raw):
+    package = Package(raw)
+    rpms = package.get('rpms')
+    if isinstance(rpms, dict):
+        package['rpms'] = {
+            rpm_name: Rpm(rpm) for rpm_name, rpm in rpms.items()
+        }
+    bugs = package.get('bugs')
+    if bugs:
+        package['bugs'] = {id: Bug(bug) for id, bug in bugs.items()}
+    return package
 
-    naming = data.setdefault('naming', {})
-    naming.update({s['ident']: s
-                   for s in data_from_file(directories, 'naming')})
 
-    collection_name = config.get('collection', 'fedora')
-    packages = data.setdefault('packages', {})
-    _pkgs = data_from_file(directories, collection_name)
-    _updates = data_from_file(directories, collection_name + '-update')
-    for name, pkg in _updates.items():
-        if name in _pkgs:
-            _merge_updates(_pkgs[name], _updates[name])
-        else:
-            print(
-                'WARNING: update for missing package:', name,
-                file=sys.stderr,
-            )
-    packages.update(_pkgs)
+def _no_phase(name):
+    return contextlib.nullcontext()
 
-    non_python_unversioned_requires = data.setdefault(
-        'non_python_unversioned_requires', {})
 
-    groups = data.setdefault('groups', {})
-    groups.update(data_from_file(directories, 'groups'))
+def _read_package(name, raw, update, phase=_no_phase):
+    """Merge an update into a raw package; return (package, deps, build_deps)
+    """
+    if update is not None:
+        with phase('update merge'):
+            _merge_updates(raw, update)
+    with phase('non-Python requirers'):
+        _consolidate_non_python_requirers(raw)
+    with phase('package records'):
+        deps = raw.pop('deps', ())
+        build_deps = raw.pop('build_deps', ())
+        return _make_package(raw), deps, build_deps
 
-    data['history'] = data_from_csv(directories, 'history')
-    data['history-naming'] = data_from_csv(directories, 'history-naming')
 
-    pagure_owner_alias = data_from_file(directories, 'pagure_owner_alias')
-    data['maintainers'] = maintainers = {}
+def _mutable(record, key):
+    """Return record[key] as a dict that can be modified in place"""
+    value = record[key]
+    if value is EMPTY:
+        value = record[key] = {}
+    return value
 
-    for name, package in packages.items():
-        package['name'] = name
-        package.setdefault('nonblocking', False)
 
-        if 'rpms' not in package:
-            print('WARNING: no RPMs in package', name, file=sys.stderr)
+def _init_package(package, name, maintainers):
+    package['name'] = name
+    package.setdefault('nonblocking', False)
 
-        package.setdefault('rpms', {})
-        package.setdefault('deps', ())
-        package.setdefault('build_deps', ())
+    if 'rpms' not in package:
+        print('WARNING: no RPMs in package', name, file=sys.stderr)
 
-        if isinstance(package['rpms'], list):
-            package['rpms'] = {rpm_name: {} for rpm_name in package['rpms']}
-        for rpm in package['rpms'].values():
-            rpm.setdefault('py_deps', {})
-
-        package['is_misnamed'] = any(rpm.get('is_misnamed')
-                                     for rpm in package['rpms'].values())
-
-        package.setdefault('status', 'unknown')
-        package.setdefault('dependents', {})
-        package.setdefault('build_dependents', {})
-        package.setdefault('groups', {})
-        package.setdefault('tracking_bugs', ())
-        package.setdefault('bugs', {})
-        package.setdefault('last_link_update', None)
-        package.setdefault('unversioned_requires', {})
-        package.setdefault('blocked_requires', {})
-
-        maintainer_names = pagure_owner_alias['rpms'].get(name, ())
-        package['maintainers'] = package_maintainers = {}
-        for maintainer_name in maintainer_names:
-            maintainer = maintainers.setdefault(
-                maintainer_name,
-                {'name': maintainer_name, 'packages': {}},
-            )
-            maintainer['packages'][name] = package
-            package_maintainers[maintainer_name] = maintainer
+    package.setdefault('rpms', {})
 
-    # Convert lists of dependency names to dicts of the package entries
-    for name, package in packages.items():
-        for attr in 'deps', 'build_deps':
-            package[attr] = {name: packages[name] for name in package[attr]}
+    if isinstance(package['rpms'], list):
+        package['rpms'] = {rpm_name: Rpm() for rpm_name in package['rpms']}
+    for rpm in package['rpms'].values():
+        rpm.setdefault('py_deps', {})
 
+    package['is_misnamed'] = any(rpm.get('is_misnamed')
+                                 for rpm in package['rpms'].values())
+
+    package.setdefault('status', 'unknown')
+    package.setdefault('groups', {})
+    package.setdefault('tracking_bugs', ())
+    package.setdefault('bugs', {})
+    package.setdefault('last_link_update', None)
+    package.setdefault('unversioned_requires', {})
+    package.setdefault('blocked_requires', {})
+    package['maintainers'] = PackageMaintainers(maintainers, name)
+
+    # Remember the status before the conversions below, which depend on
+    # other packages
+    package._base_status = package['status']
+
+
+def _convert_py3_only(package):
     # Convert "released" packages with all ported RPMs to "py3-only"
-    for name, package in packages.items():
-        if package['status'] == 'released':
-            for rpm in package['rpms'].values():
-                if any(version == 2 for version in rpm['py_deps'].values()):
-                    break
-            else:
-                package['status'] = 'py3-only'
+    if package['status'] == 'released':
+        for rpm in package['rpms'].values():
+            if any(version == 2 for version in rpm['py_deps'].values()):
+                break
+        else:
+            package['status'] = 'py3-only'
+
 
+def _convert_blocked(graph, i):
     # Convert "idle" packages with un-ported dependencies to "blocked"
-    for name, package in packages.items():
-        if package['status'] == 'idle':
-            for dname, dpackage in package['deps'].items():
-                if (
-                    dpackage['status'] not in DONE_STATUSES
-                    and not dpackage['nonblocking']
-                ):
-                    package['status'] = 'blocked'
-                    break
+    package = graph.packages[i]
+    if package['status'] == 'idle':
+        for d in graph.neighbors('deps', i):
+            dpackage = graph.packages[d]
+            if (
+                dpackage['status'] not in DONE_STATUSES
+                and not dpackage['nonblocking']
+            ):
+                package['status'] = 'blocked'
+                break
 
-    # Add `status_obj`
-    for name, package in packages.items():
-        package['status_obj'] = statuses.get(package['status'])
 
-    # Convert link info
-    for name, package in packages.items():
-        links = []
-        link_updates = []
-        links_info = package.get('links', {})
-        if isinstance(links_info, list):
-            # Ignore old link format
-            continue
-        for link_type, link_info in links_info.items():
+def _convert_links(package):
+    links = []
+    link_updates = []
+    links_info = package.get('links', {})
+    if isinstance(links_info, list):
+        # Ignore old link format
+        return
+    for link_type, link_info in links_info.items():
+        if isinstance(link_info, str):
+            url = link_info
+            note = None
+            time = None
+        else:
             if isinstance(link_info, str):
                 url = link_info
-                note = None
+                note = time = None
+            elif len(link_info) == 2:
+                url, note = link_info
                 time = None
             else:
-                if isinstance(link_info, str):
-                    url = link_info
-                    note = time = None
-                elif len(link_info) == 2:
-                    url, note = link_info
-                    time = None
-                else:
-                    url, note, time = link_info
-                    time = datetime.datetime.strptime(time, '%Y-%m-%d %H:%M:%S')
-                    link_updates.append(time)
-            links.append({
-                'url': url,
-                'type': link_type,
-                'note': note,
-                'last_update': time,
-            })
-        package['links'] = links
-        if link_updates:
-            package['last_link_update'] = max(link_updates)
-
-    # Add dependent packages
-    for name, package in packages.items():
-        for pkg in package['deps'].values():
-            pkg['dependents'][package['name']] = package
-        for pkg in package['build_deps'].values():
-            pkg['build_dependents'][package['name']] = package
+                url, note, time = link_info
+                time = datetime.datetime.strptime(time, '%Y-%m-%d %H:%M:%S')
+                link_updates.append(time)
+        links.append({
+            'url': url,
+            'type': link_type,
+            'note': note,
+            'last_update': time,
+        })
+    package['links'] = links
+    if link_updates:
+        package['last_link_update'] = max(link_updates)
+
+
+def _init_group(group, ident, packages):
+    group['ident'] = ident
+    group.setdefault('hidden', False)
+    group['seed_packages'] = {}
+    group['untracked_packages'] = set()
+    for name in group['packages']:
+        if name in packages:
+            group['seed_packages'][name] = packages[name]
+        else:
+            group['untracked_packages'].add(name)
 
-    # Add pending requirers/requirements
-    for name, package in packages.items():
-        for src, dest in ('dependents', 'pending_dependents'), ('deps', 'pending_deps'):
-            package[dest] = {
-                d['name']: d
-                for d in package[src].values()
-                if d['status'] not in DONE_STATUSES
-            }
 
-    # Update groups
-    for ident, group in groups.items():
-        group['ident'] = ident
-        group.setdefault('hidden', False)
-        group['seed_packages'] = {}
-        group['untracked_packages'] = set()
-        for name in group['packages']:
-            if name in packages:
-                group['seed_packages'][name] = packages[name]
-            else:
-                group['untracked_packages'].add(name)
-        names_to_add = set(group['seed_packages'])
-        names_added = set()
-        group['packages'] = pkgs = {}
-        while names_to_add:
-            name = names_to_add.pop()
-            if name in names_added:
-                continue
-            names_added.add(name)
-            package = packages[name]
-            pkgs[name] = package
-            package['groups'][ident] = group
-            for dep in package['deps']:
-                names_to_add.add(dep)
-            for dep in packages[name]['build_deps']:
-                names_to_add.add(dep)
+def _group_closure(reachable, group):
+    """Set group['packages'] to the seed packages and all their dependencies
 
-    # Update unversioned requirers
+    `reachable` is a Reachability over run-time and build dependencies.
+    """
+    graph = reachable.graph
+    visited = reachable(graph.ids[name] for name in group['seed_packages'])
+    group['packages'] = {
+        graph.names[i]: graph.packages[i] for i in sorted(visited)
+    }
+
+
+def _add_unversioned_requires(packages, non_python_unversioned_requires):
     for name, package in packages.items():
         for requirer_name in package.get('unversioned_requirers', ()):
             requirer = packages.get(requirer_name)
             if requirer:
-                requirer['unversioned_requires'][name] = package
+                _mutable(requirer, 'unversioned_requires')[name] = package
                 if package['is_misnamed'] and package != requirer:
-                    requirer['blocked_requires'][name] = package
+                    _mutable(requirer, 'blocked_requires')[name] = package
             else:
                 non_python_unversioned_requires.setdefault(
                     requirer_name, {}
                 )[name] = package
 
+
+def _set_ftbfs_age(package):
     # Add releasever of last build (to identify long-standing FTBFS)
     # Just look for the dist tag "fc<n>" as the last component of the RPM,
     # and ignore anything that doesn't use that scheme.
     # This is not foolproof, but enough.
-    for name, package in packages.items():
-        releasever = None
-        for rpm_name in package['rpms']:
-            nv, sep, release = rpm_name.rpartition('-')
-            for part in reversed(release.split('.')):
-                if part.startswith('fc'):
-                    try:
-                        releasever = int(part[2:])
-                    except ValueError:
-                        continue
-                    else:
-                        break
-            if releasever:
-                break
+    releasever = None
+    for rpm_name in package['rpms']:
+        nv, sep, release = rpm_name.rpartition('-')
+        for part in reversed(release.split('.')):
+            if part.startswith('fc'):
+                try:
+                    releasever = int(part[2:])
+                except ValueError:
+                    continue
+                else:
+                    break
         if releasever:
-            package['last_build_releasever'] = releasever
-            package['ftbfs_age'] = max(CURRENT_FEDORA - releasever, 0)
-        else:
-            package['ftbfs_age'] = 0
+            break
+    if releasever:
+        package['last_build_releasever'] = releasever
+        package['ftbfs_age'] = max(CURRENT_FEDORA - releasever, 0)
+    else:
+        package['ftbfs_age'] = 0
 
-    # Postprocess bugs
+
+def _postprocess_bugs(package):
     # - Add bug ID to the bug's info dict
     # - Convert last_change to datetime
-    for name, package in packages.items():
-        for id, bug in package['bugs'].items():
-            bug['id'] = id
-            if bug['last_change']:
-                last_change = datetime.datetime.strptime(
-                    bug['last_change'], '%Y-%m-%d %H:%M:%S',
-                )
-                bug['last_change'] = last_change
-
-    # Consolidate non-Python requirers
-    for name, package in packages.items():
-        # fedora.json contains non_python_requirers data for each RPM.
-        # Add a summary to each component.
-        nonpy_requirers = {}
-        for rpm in package['rpms'].values():
-            for kind, names in rpm.get('non_python_requirers', {}).items():
-               if names:
-                    nonpy_requirers.setdefault(kind, set()).update(names)
-        package['non_python_requirers'] = nonpy_requirers
+    for id, bug in package['bugs'].items():
+        bug['id'] = id
+        if bug['last_change']:
+            last_change = datetime.datetime.strptime(
+                bug['last_change'], '%Y-%m-%d %H:%M:%S',
+            )
+            bug['last_change'] = last_change
+
+
+def _compact(package):
+    # Share empty containers
+    package.compact()
+    for rpm in package['rpms'].values():
+        rpm.compact()
+
+
+def _decode_jobs(directories, collection_name):
+    """Return {key: (function, args)} for decoding the smaller input files"""
+    return {
+        'statuses': (data_from_file, (directories, 'statuses')),
+        'naming': (data_from_file, (directories, 'naming')),
+        'groups': (data_from_file, (directories, 'groups')),
+        'updates': (
+            data_from_file, (directories, collection_name + '-update')),
+        'history': (history_from_csv, (directories, 'history')),
+        'history-naming': (
+            history_from_csv, (directories, 'history-naming')),
+    }
+
+
+class LoadProfile:
+    """Wall time, CPU time and traced memory of loading phases
+
+    Use phase(name) as a context manager around each phase. Phases can
+    be entered repeatedly (totals are accumulated) and nested (the time
+    spent in inner phases is not counted for the outer one).
+    Memory is only measured while tracemalloc is tracing.
+    """
+    def __init__(self):
+        # name -> [calls, wall time, CPU time, memory delta]
+        self.phases = {}
+        self._stack = []
+
+    @staticmethod
+    def _measure():
+        if tracemalloc.is_tracing():
+            memory = tracemalloc.get_traced_memory()[0]
+        else:
+            memory = 0
+        return time.perf_counter(), time.process_time(), memory
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        totals = self.phases.setdefault(name, [0, 0, 0, 0])
+        inner = [0, 0, 0]
+        self._stack.append(inner)
+        start = self._measure()
+        try:
+            yield
+        finally:
+            spent = [e - s for s, e in zip(start, self._measure())]
+            self._stack.pop()
+            totals[0] += 1
+            for i, value in enumerate(spent):
+                totals[i + 1] += value - inner[i]
+            if self._stack:
+                outer = self._stack[-1]
+                for i, value in enumerate(spent):
+                    outer[i] += value
+
+    def as_dicts(self):
+        return [
+            {
+                'phase': name, 'calls': calls,
+                'wall_time': wall, 'cpu_time': cpu, 'memory': memory,
+            }
+            for name, (calls, wall, cpu, memory) in self.phases.items()
+        ]
+
+
+def load_from_directories(data, directories, parallel=False, profile=None):
+    """Load and post-process data from the given directories into `data`
+
+    With parallel=True, the smaller input files are decoded in a process
+    pool while the collection is read in this process.
+
+    If a LoadProfile is given, the loading phases are measured in it.
+    """
+    phase = profile.phase if profile else _no_phase
+
+    with phase('decode config'):
+        config = data.setdefault('config', {})
+        config.update(data_from_file(directories, 'config'))
+        collection_name = config.get('collection', 'fedora')
+
+    jobs = _decode_jobs(directories, collection_name)
+    with contextlib.ExitStack() as stack:
+        if parallel:
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(len(jobs), os.cpu_count() or 1),
+                ),
+            )
+            futures = {
+                key: executor.submit(function, *args)
+                for key, (function, args) in jobs.items()
+            }
+
+            def decoded(key):
+                with phase('decode ' + key):
+                    return futures.pop(key).result()
+        else:
+            def decoded(key):
+                with phase('decode ' + key):
+                    function, args = jobs.pop(key)
+                    return function(*args)
+
+        statuses = data.setdefault('statuses', {})
+        statuses.update({s['ident']: s for s in decoded('statuses')})
+
+        # Naming statuses are available under two keys
+        naming_statuses = data.setdefault('naming_statuses', {})
+        naming_statuses.update({s['ident']: s for s in decoded('naming')})
+        data.setdefault('naming', {}).update(naming_statuses)
+
+        packages = data.setdefault('packages', {})
+        dep_names = {}
+        _updates = decoded('updates')
+        # Keep the overrides, so update_packages can tell what changed
+        data['package_updates'] = copy.deepcopy(_updates)
+        # The collection is read one package at a time, and each package
+        # is trimmed right away, to keep peak memory use low.
+        with phase('decode collection'):
+            for name, pkg in iter_collection(directories, collection_name):
+                name = sys.intern(name)
+                packages[name], *dep_names[name] = _read_package(
+                    name, pkg, _updates.pop(name, None), phase)
+        for name in _updates:
+            print(
+                'WARNING: update for missing package:', name,
+                file=sys.stderr,
+            )
+
+        groups = data.setdefault('groups', {})
+        groups.update(decoded('groups'))
+
+        data['history'] = decoded('history')
+        data['history-naming'] = decoded('history-naming')
+
+    non_python_unversioned_requires = data.setdefault(
+        'non_python_unversioned_requires', {})
+
+    # Maintainers are only loaded if needed
+    data['maintainers'] = maintainers = MaintainerIndex(
+        functools.partial(
+            read_package_owners,
+            find_file(directories, 'pagure_owner_alias'),
+        ),
+        packages,
+        statuses,
+    )
+
+    with phase('package defaults'):
+        for name, package in packages.items():
+            _init_package(package, name, maintainers)
+
+    # Build the dependency graph. This makes "deps", "build_deps",
+    # "dependents", "build_dependents" and the "pending_*" variants available
+    # on packages.
+    with phase('dependency graph'):
+        data['graph'] = graph = DepGraph(
+            packages.values(),
+            deps=[dep_names[name][0] for name in packages],
+            build_deps=[dep_names[name][1] for name in packages],
+            done_statuses=DONE_STATUSES,
+        )
+        del dep_names
+
+    # Convert "released" packages with all ported RPMs to "py3-only"
+    with phase('py3-only status'):
+        for name, package in packages.items():
+            _convert_py3_only(package)
+
+    # Convert "idle" packages with un-ported dependencies to "blocked"
+    with phase('blocked status'):
+        for i in range(len(graph)):
+            _convert_blocked(graph, i)
+
+    # Add `status_obj`
+    with phase('status objects'):
+        for name, package in packages.items():
+            package['status_obj'] = statuses.get(package['status'])
+
+    # Convert link info
+    with phase('link conversion'):
+        for name, package in packages.items():
+            _convert_links(package)
+
+    # Update groups
+    # Groups share large parts of the dependency graph, so closures are
+    # computed on the graph's condensation, reusing results across groups.
+    with phase('group closure'):
+        reachable = Reachability(graph, ('deps', 'build_deps'))
+        for ident, group in groups.items():
+            _init_group(group, ident, packages)
+            _group_closure(reachable, group)
+            for package in group['packages'].values():
+                package['groups'][ident] = group
+        del reachable
+
+    # Update unversioned requirers
+    with phase('unversioned requires'):
+        _add_unversioned_requires(packages, non_python_unversioned_requires)
+
+    # Add releasever of last build (to identify long-standing FTBFS)
+    with phase('releasever scan'):
+        for name, package in packages.items():
+            _set_ftbfs_age(package)
+
+    # Postprocess bugs
+    with phase('bug dates'):
+        for name, package in packages.items():
+            _postprocess_bugs(package)
+
+    # Share empty containers
+    with phase('compaction'):
+        for name, package in packages.items():
+            _compact(package)
+
+    with phase('indexes'):
+        _update_status_indexes(data)
+
+
+def _update_status_indexes(data):
+    """(Re)build indexes of packages by status and other attributes
+
+    The search index is only built when it's first used.
+    """
+    statuses = data['statuses']
+    data['status_index'] = StatusIndex(data['packages'].values(), statuses)
+    data['package_index'] = PackageIndex(data['packages'].values())
+    data['search_index'] = SearchIndex(data['packages'], data['maintainers'])
+    for group in data['groups'].values():
+        group['status_index'] = StatusIndex(
+            group['packages'].values(), statuses)
+    data['maintainers'].update_status_indexes()
+
+
+def update_packages(data, directories, updates=None):
+    """Apply changes in the collection's -update file to loaded data
+
+    This is a faster alternative to reloading everything, for when only
+    the -update file (e.g. fedora-update.yaml) changed since the data was
+    loaded.
+    If `updates` is given, it is used instead of the file's contents.
+
+    Only packages whose overrides changed are re-read from the collection
+    and re-processed. Statuses of their dependents are recomputed, and so
+    are groups if dependencies changed.
+
+    Returns the set of names of packages that were re-read.
+    """
+    config = data['config']
+    collection_name = config.get('collection', 'fedora')
+    packages = data['packages']
+    graph = data['graph']
+    groups = data['groups']
+    maintainers = data['maintainers']
+
+    old_updates = data['package_updates']
+    if updates is None:
+        new_updates = data_from_file(directories, collection_name + '-update')
+    else:
+        new_updates = updates
+    changed = {
+        name for name in old_updates.keys() | new_updates.keys()
+        if old_updates.get(name) != new_updates.get(name)
+    }
+    data['package_updates'] = copy.deepcopy(new_updates)
+    for name in sorted(changed - packages.keys()):
+        if name in new_updates:
+            print(
+                'WARNING: update for missing package:', name,
+                file=sys.stderr,
+            )
+    changed &= packages.keys()
+
+    # Re-read the affected packages
+    dep_names = {}
+    new_packages = {}
+    for name, pkg in iter_collection(directories, collection_name):
+        if name in changed:
+            new_packages[name], *dep_names[name] = _read_package(
+                name, pkg, new_updates.get(name))
+
+    old_requirers = {}
+    deps_changed = False
+    for name, new_package in new_packages.items():
+        package = packages[name]
+        old_requirers[name] = (
+            package.get('unversioned_requirers'), package['is_misnamed'])
+        for kind, new_deps in zip(('deps', 'build_deps'), dep_names[name]):
+            if list(package[kind]) != list(dict.fromkeys(new_deps)):
+                deps_changed = True
+
+        # Replace the package's contents in place, since other data
+        # (groups, maintainers, the graph) reference it.
+        # Keep information derived from other packages.
+        unversioned_requires = package['unversioned_requires']
+        blocked_requires = package['blocked_requires']
+        package_groups = package['groups']
+        package.clear()
+        package.update(new_package)
+        _init_package(package, name, maintainers)
+        package['unversioned_requires'] = unversioned_requires
+        package['blocked_requires'] = blocked_requires
+        package['groups'] = package_groups
+
+    if deps_changed:
+        deps = []
+        build_deps = []
+        for i, name in enumerate(graph.names):
+            for kind, lst in ('deps', deps), ('build_deps', build_deps):
+                if name in dep_names:
+                    lst.append(dep_names[name][kind == 'build_deps'])
+                else:
+                    lst.append(
+                        [graph.names[j] for j in graph.neighbors(kind, i)])
+        old_graph = graph
+        data['graph'] = graph = DepGraph(
+            old_graph.packages, deps, build_deps,
+            done_statuses=DONE_STATUSES,
+        )
+
+        # Recompute groups that contained a changed package
+        affected_packages = set()
+        reachable = Reachability(graph, ('deps', 'build_deps'))
+        for ident, group in groups.items():
+            if changed & group['packages'].keys():
+                affected_packages.update(group['packages'])
+                _group_closure(reachable, group)
+                affected_packages.update(group['packages'])
+        for name in affected_packages:
+            packages[name]['groups'] = {
+                ident: group for ident, group in groups.items()
+                if name in group['packages']
+            }
+
+    # Recompute statuses of changed packages and their dependents
+    # (Package ids don't change when the graph is rebuilt, but dependents
+    # that were removed need to be checked too.)
+    to_check = set()
+    for name in changed:
+        i = graph.ids[name]
+        to_check.add(i)
+        to_check.update(graph.neighbors('dependents', i))
+        if deps_changed:
+            to_check.update(old_graph.neighbors('dependents', i))
+    to_check = sorted(to_check)
+    for i in to_check:
+        package = graph.packages[i]
+        package['status'] = package._base_status
+        _convert_py3_only(package)
+    for i in to_check:
+        _convert_blocked(graph, i)
+    for i in to_check:
+        package = graph.packages[i]
+        package['status_obj'] = data['statuses'].get(package['status'])
+
+    for name in changed:
+        package = packages[name]
+        _convert_links(package)
+        _set_ftbfs_age(package)
+        _postprocess_bugs(package)
+
+    # Unversioned requires are cheap to recompute, but need all packages
+    # to be updated.
+    if any(
+        (packages[name].get('unversioned_requirers'),
+         packages[name]['is_misnamed'])
+        != old_requirers[name]
+        for name in changed
+    ):
+        for package in packages.values():
+            package['unversioned_requires'] = {}
+            package['blocked_requires'] = {}
+        non_python_unversioned_requires = data[
+            'non_python_unversioned_requires']
+        non_python_unversioned_requires.clear()
+        _add_unversioned_requires(packages, non_python_unversioned_requires)
+        for package in packages.values():
+            package.compact()
+    for name in changed:
+        _compact(packages[name])
+
+    _update_status_indexes(data)
+
+    if updates is None:
+        data['fingerprint'] = data_fingerprint(directories)
+        data['last_modified'] = data_last_modified(directories)
+    else:
+        # The data no longer matches the files
+        data['last_modified'] = datetime.datetime.now(
+            datetime.timezone.utc).replace(microsecond=0)
+        hasher = hashlib.sha256(data['fingerprint'].encode())
+        hasher.update(json.dumps(updates, sort_keys=True, default=str).encode())
+        data['fingerprint'] = hasher.hexdigest()
+    return changed
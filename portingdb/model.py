@@ -0,0 +1,874 @@
+"""Compact records for the loaded data
+
+There are many packages, RPMs and bugs, so they are stored in objects with
+__slots__ rather than in dicts.
+For compatibility with code and templates that treat them as dicts, the
+records implement the mapping interface. Keys that don't have a slot are
+kept in a per-record "extra" dict.
+
+Dependency relationships are stored in a DepGraph, which numbers packages
+densely and keeps edges in compressed sparse row arrays.
+Packages expose their neighbors as read-only {name: package} views.
+
+Status history is kept in columns of integers, in a History.
+
+PackageIndex and SearchIndex answer API queries and searches without
+scanning all packages.
+"""
+
+import array
+import bisect
+import datetime
+import collections.abc
+import sys
+
+
+class _EmptyMapping(collections.abc.Mapping):
+    """Immutable empty mapping, shared by all records that need one"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __repr__(self):
+        return 'EMPTY'
+
+    def __reduce__(self):
+        # Unpickle as the module-level singleton
+        return 'EMPTY'
+
+
+EMPTY = _EmptyMapping()
+
+
+class Record(collections.abc.MutableMapping):
+    """Base for dict-like records. Subclasses set __slots__ to field names.
+
+    Slots starting with an underscore are private, and not exposed as keys.
+    Read-only properties listed in _computed are exposed as keys.
+    Values of fields listed in _interned are interned strings.
+    """
+    __slots__ = ('_extra', )
+    _interned = frozenset()
+    _computed = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._all_slots = tuple(
+            name
+            for c in reversed(cls.__mro__)
+            for name in c.__dict__.get('__slots__', ())
+        )
+        cls._keys = tuple(
+            name for name in cls.__slots__ if not name.startswith('_')
+        ) + cls._computed
+        cls._fields = frozenset(cls._keys)
+
+    def __init__(self, items=()):
+        self._extra = None
+        self.update(items)
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._fields:
+            if key in self._interned and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        if key in self._fields:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key in self._keys:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    # Records reference each other in cycles; compare by identity
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.get('name', '?'))
+
+    def __getstate__(self):
+        return {
+            name: getattr(self, name)
+            for name in self._all_slots
+            if hasattr(self, name)
+        }
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def clear(self):
+        """Remove all keys. Private slots are kept."""
+        for key in self.__slots__:
+            if not key.startswith('_') and hasattr(self, key):
+                delattr(self, key)
+        self._extra = None
+
+    def compact(self):
+        """Replace empty dicts by the shared EMPTY mapping
+
+        After this, the record's empty containers can't be modified in place.
+        """
+        for key in self.__slots__:
+            value = getattr(self, key, None)
+            if type(value) is dict and not value:
+                setattr(self, key, EMPTY)
+        if not self._extra:
+            self._extra = None
+
+
+def _graph_view(kind, pending=False):
+    def get(self):
+        return PackageView(self._graph, kind, self._id, pending)
+    return property(get)
+
+
+class Package(Record):
+    __slots__ = (
+        'name', 'status', 'status_obj', 'nonblocking', 'note',
+        'rpms', 'is_misnamed',
+        'unversioned_requirers', 'unversioned_requires', 'blocked_requires',
+        'non_python_requirers',
+        'groups', 'maintainers',
+        'tracking_bugs', 'bugs', 'links', 'last_link_update',
+        'last_build_releasever', 'ftbfs_age',
+        '_graph', '_id', '_base_status',
+    )
+    _computed = (
+        'deps', 'build_deps', 'dependents', 'build_dependents',
+        'pending_deps', 'pending_dependents',
+    )
+    _interned = frozenset({'name', 'status'})
+
+    deps = _graph_view('deps')
+    build_deps = _graph_view('build_deps')
+    dependents = _graph_view('dependents')
+    build_dependents = _graph_view('build_dependents')
+    # Neighbors that aren't done yet (see DepGraph.done_statuses)
+    pending_deps = _graph_view('deps', pending=True)
+    pending_dependents = _graph_view('dependents', pending=True)
+
+
+class Rpm(Record):
+    __slots__ = ('py_deps', 'is_misnamed', 'arch', 'almost_leaf', 'legacy_leaf')
+    _interned = frozenset({'arch'})
+
+
+class Bug(Record):
+    __slots__ = (
+        'id', 'url', 'short_desc', 'status', 'resolution', 'last_change',
+        'trackers',
+    )
+    _interned = frozenset({'status', 'resolution'})
+
+    def __repr__(self):
+        return '<Bug {}>'.format(self.get('id', '?'))
+
+
+def _csr(neighbor_lists):
+    """Convert a list of lists of ints to (offsets, targets) arrays"""
+    offsets = array.array('I', [0])
+    targets = array.array('I')
+    for neighbors in neighbor_lists:
+        targets.extend(neighbors)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class DepGraph:
+    """Dependency graph of packages, in compressed sparse row form
+
+    Package i is packages[i]; its name is names[i], and ids maps names back
+    to indices.
+    For each kind of edge (see KINDS), neighbors of package i are
+    targets[kind][offsets[kind][i]:offsets[kind][i+1]].
+
+    done_statuses are statuses of packages that don't count as "pending".
+    """
+    KINDS = ('deps', 'build_deps', 'dependents', 'build_dependents')
+
+    def __init__(self, packages, deps, build_deps, done_statuses):
+        """Build the graph and attach it to the given packages
+
+        deps and build_deps give, for each package, the names of its
+        run-time and build-time dependencies.
+        """
+        self.packages = list(packages)
+        self.names = [package['name'] for package in self.packages]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.done_statuses = frozenset(done_statuses)
+        self.offsets = {}
+        self.targets = {}
+        for kind, reverse_kind, name_lists in (
+            ('deps', 'dependents', deps),
+            ('build_deps', 'build_dependents', build_deps),
+        ):
+            forward = [
+                [self.ids[name] for name in dict.fromkeys(names)]
+                for names in name_lists
+            ]
+            backward = [[] for package in self.packages]
+            for source, targets in enumerate(forward):
+                for target in targets:
+                    backward[target].append(source)
+            self.offsets[kind], self.targets[kind] = _csr(forward)
+            self.offsets[reverse_kind], self.targets[reverse_kind] = (
+                _csr(backward))
+        for i, package in enumerate(self.packages):
+            package._graph = self
+            package._id = i
+
+    def __len__(self):
+        return len(self.packages)
+
+    def neighbors(self, kind, i):
+        """Return an array of ids of the given kind of neighbors of package i
+        """
+        offsets = self.offsets[kind]
+        return self.targets[kind][offsets[i]:offsets[i + 1]]
+
+    def is_pending(self, i):
+        return self.packages[i]['status'] not in self.done_statuses
+
+
+def strongly_connected_components(n, successors):
+    """Find strongly connected components of a graph with nodes 0..n-1
+
+    successors(v) gives the nodes that v has edges to.
+
+    Returns (component, members): component[v] is the number of v's
+    component, and members[c] lists nodes in component c.
+    Components are numbered in reverse topological order: edges between
+    components go from higher to lower numbers.
+    """
+    # Iterative version of Tarjan's algorithm
+    component = [None] * n
+    index = [None] * n
+    lowlink = [0] * n
+    stack = []
+    on_stack = [False] * n
+    members = []
+    counter = 0
+    for root in range(n):
+        if index[root] is not None:
+            continue
+        work = [(root, iter(successors(root)))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, v_successors = work[-1]
+            for w in v_successors:
+                if index[w] is None:
+                    index[w] = lowlink[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, iter(successors(w))))
+                    break
+                elif on_stack[w]:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u], lowlink[v])
+                if lowlink[v] == index[v]:
+                    c = len(members)
+                    scc = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = c
+                        scc.append(w)
+                        if w == v:
+                            break
+                    members.append(scc)
+    return component, members
+
+
+class Reachability:
+    """Transitive closure over some kinds of edges in a DepGraph
+
+    The graph is condensed into its strongly connected components once.
+    Sets of packages reachable from each component are computed when first
+    needed, from the sets of its successors, and memoized.
+    So, finding closures of many overlapping sets of packages walks
+    the shared part of the graph only once.
+    The sets are stored as int bitmasks (bit i is package i), so unions
+    are cheap.
+
+    The memoized sets can take a lot of memory; drop the Reachability
+    object when it's no longer needed.
+    """
+    def __init__(self, graph, kinds=('deps', 'build_deps')):
+        self.graph = graph
+        self.kinds = kinds
+        self._reachable = {}
+        self._condense()
+
+    def _successors(self, i):
+        for kind in self.kinds:
+            yield from self.graph.neighbors(kind, i)
+
+    def _condense(self):
+        self.component, self.members = strongly_connected_components(
+            len(self.graph), self._successors)
+        component = self.component
+        self.successors = [
+            {
+                component[w]
+                for v in scc for w in self._successors(v)
+                if component[w] != c
+            }
+            for c, scc in enumerate(self.members)
+        ]
+
+    def _component_closure(self, c):
+        """Return a bitmask of packages reachable from component c"""
+        try:
+            return self._reachable[c]
+        except KeyError:
+            pass
+        # Successors have lower numbers, so handling pending components
+        # in increasing order means successors are always done first.
+        pending = set()
+        to_visit = [c]
+        while to_visit:
+            d = to_visit.pop()
+            if d in pending or d in self._reachable:
+                continue
+            pending.add(d)
+            to_visit.extend(self.successors[d])
+        for d in sorted(pending):
+            reachable = 0
+            for i in self.members[d]:
+                reachable |= 1 << i
+            for s in self.successors[d]:
+                reachable |= self._reachable[s]
+            self._reachable[d] = reachable
+        return self._reachable[c]
+
+    def __call__(self, ids):
+        """Return the set of ids of packages reachable from the given ones
+
+        The given packages are included.
+        """
+        mask = 0
+        for c in {self.component[i] for i in ids}:
+            mask |= self._component_closure(c)
+        return {
+            i for i, bit in enumerate(reversed(bin(mask)))
+            if bit == '1'
+        }
+
+
+class PackageView(collections.abc.Mapping):
+    """Read-only {name: package} mapping of a package's neighbors in a graph
+    """
+    __slots__ = ('_graph', '_ids')
+
+    def __init__(self, graph, kind, i, pending=False):
+        ids = graph.neighbors(kind, i)
+        if pending:
+            ids = [j for j in ids if graph.is_pending(j)]
+        self._graph = graph
+        self._ids = ids
+
+    def __getitem__(self, name):
+        i = self._graph.ids.get(name)
+        if i is None or i not in self._ids:
+            raise KeyError(name)
+        return self._graph.packages[i]
+
+    def __iter__(self):
+        names = self._graph.names
+        return (names[i] for i in self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def values(self):
+        packages = self._graph.packages
+        return [packages[i] for i in self._ids]
+
+    def items(self):
+        packages = self._graph.packages
+        return [(packages[i]['name'], packages[i]) for i in self._ids]
+
+    def ids(self):
+        return self._ids
+
+    def __repr__(self):
+        return '<PackageView {}>'.format(list(self))
+
+
+class StatusIndex:
+    """Packages grouped by status, with ready-made counts
+
+    by_status maps status idents to lists of packages, in the order the
+    packages were given. counts maps status idents to numbers of packages.
+    Both only include statuses that some package has.
+    summary lists (status, count) pairs for statuses (a {ident: status}
+    mapping) that some package has, in the order of statuses.
+    """
+    __slots__ = ('by_status', 'counts', 'total', 'summary')
+
+    def __init__(self, packages, statuses):
+        self.by_status = {}
+        for package in packages:
+            self.by_status.setdefault(package['status'], []).append(package)
+        self.counts = {
+            ident: len(packages) for ident, packages in self.by_status.items()
+        }
+        self.total = sum(self.counts.values())
+        self.summary = [
+            (status, self.counts[ident])
+            for ident, status in statuses.items()
+            if ident in self.counts
+        ]
+
+    def packages(self, status):
+        """Return a list of packages with the given status"""
+        return self.by_status.get(status, [])
+
+    def count(self, status):
+        return self.counts.get(status, 0)
+
+
+# Architectures that can end an RPM's NEVRA (see rpm_nvr)
+RPM_ARCHES = frozenset({
+    'noarch', 'src', 'x86_64', 'i686', 'i386', 'aarch64', 'armv7hl',
+    'ppc64le', 'ppc64', 's390x',
+})
+
+
+def rpm_nvr(nevra):
+    """Return name-version-release of an RPM given as N-[E:]V-R[.A]
+
+    The epoch and the architecture (if it's in RPM_ARCHES) are removed.
+    Strings that have no version and release are returned without
+    the architecture.
+    """
+    base, dot, arch = nevra.rpartition('.')
+    if dot and arch in RPM_ARCHES:
+        nevra = base
+    parts = nevra.rsplit('-', 2)
+    if len(parts) == 3:
+        parts[1] = parts[1].rpartition(':')[2]
+    return '-'.join(parts)
+
+
+class PackageIndex:
+    """Packages indexed by the attributes the package API filters on
+
+    Packages are numbered in order of their names: names[i] is the name of
+    packages[i], and positions maps names back to numbers.
+    by_status, by_group, by_tracker, by_ftbfs_age and by_misnamed map
+    status idents, group idents, tracking bug ids (as strings), FTBFS ages
+    and is_misnamed values to sets of package numbers.
+    by_rpm_nvr and by_rpm_name map names-versions-releases (see rpm_nvr)
+    and names of RPMs to the number of their source package (see find).
+    """
+    __slots__ = (
+        'packages', 'names', 'positions',
+        'by_status', 'by_group', 'by_tracker', 'by_ftbfs_age', 'by_misnamed',
+        'by_rpm_nvr', 'by_rpm_name',
+    )
+
+    def __init__(self, packages):
+        self.packages = sorted(packages, key=lambda p: p['name'])
+        self.names = [package['name'] for package in self.packages]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.by_status = {}
+        self.by_group = {}
+        self.by_tracker = {}
+        self.by_ftbfs_age = {}
+        self.by_misnamed = {True: set(), False: set()}
+        self.by_rpm_nvr = {}
+        self.by_rpm_name = {}
+        for i, package in enumerate(self.packages):
+            self.by_status.setdefault(package['status'], set()).add(i)
+            for ident in package['groups']:
+                self.by_group.setdefault(ident, set()).add(i)
+            for bug_id in package['tracking_bugs']:
+                self.by_tracker.setdefault(str(bug_id), set()).add(i)
+            self.by_ftbfs_age.setdefault(package['ftbfs_age'], set()).add(i)
+            self.by_misnamed[bool(package['is_misnamed'])].add(i)
+            for nevra in package['rpms']:
+                nvr = rpm_nvr(nevra)
+                self.by_rpm_nvr.setdefault(nvr, i)
+                self.by_rpm_name.setdefault(nvr.rsplit('-', 2)[0], i)
+
+    def __len__(self):
+        return len(self.packages)
+
+    def find(self, name):
+        """Return the number of a package given by its name or an RPM
+
+        The RPM can be given by its name or NEVRA (see rpm_nvr).
+        A NEVRA of a build that isn't in the data is looked up by name.
+        Returns None if there's no such package.
+        """
+        i = self.positions.get(name)
+        if i is None:
+            nvr = rpm_nvr(name)
+            i = self.by_rpm_nvr.get(nvr)
+            if i is None:
+                i = self.by_rpm_name.get(nvr)
+            if i is None:
+                parts = nvr.rsplit('-', 2)
+                # Names like "python3-foo" aren't name "python3", version "foo"
+                if len(parts) == 3 and parts[1][:1].isdigit():
+                    i = self.by_rpm_name.get(parts[0])
+        return i
+
+    def named(self, names):
+        """Return the set of numbers of the named packages
+
+        Names of packages that aren't indexed are ignored.
+        """
+        positions = self.positions
+        return {positions[name] for name in names if name in positions}
+
+    def with_ftbfs_age(self, minimum):
+        """Return the set of numbers of packages with ftbfs_age >= minimum"""
+        return set().union(*(
+            ids for age, ids in self.by_ftbfs_age.items() if age >= minimum
+        ))
+
+    def select(self, constraints, after=None, limit=None):
+        """Return packages whose numbers are in all of the given sets
+
+        Packages are returned in order of their names. Only packages named
+        after `after` are included, and at most `limit` of them, so the
+        name of the last returned package can be used to get the next page.
+        """
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(self.names, after)
+        if constraints:
+            smallest, *others = sorted(constraints, key=len)
+            matching = smallest.intersection(*others)
+            ids = sorted(i for i in matching if i >= start)
+        else:
+            ids = range(start, len(self.packages))
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.packages[i] for i in ids]
+
+
+class MaintainerIndex(collections.abc.Mapping):
+    """Lazily built {name: maintainer} mapping
+
+    Package owners are only read, using load_owners(), when they are first
+    needed. load_owners() should return a {package name: maintainer names}
+    mapping; owners of packages that aren't in `packages` are ignored.
+
+    Maintainer entries, {'name': name, 'packages': {name: package},
+    'status_index': StatusIndex}, are created when first requested.
+    `statuses` is used for the StatusIndex summaries.
+    """
+    def __init__(self, load_owners, packages, statuses):
+        self._load_owners = load_owners
+        self._packages = packages
+        self._statuses = statuses
+        self._owners = None
+        self._maintained = None
+        self._entries = {}
+
+    def _load(self):
+        # Other threads may use the index while it's loading, so the
+        # dicts are only made available when they're complete
+        owners = self._load_owners()
+        package_owners = {}
+        maintained = {}
+        for name in self._packages:
+            names = tuple(owners.get(name, ()))
+            if names:
+                package_owners[name] = names
+            for maintainer_name in names:
+                maintained.setdefault(maintainer_name, []).append(name)
+        self._maintained = maintained
+        self._owners = package_owners
+
+    def owners(self, package_name):
+        """Return names of maintainers of the given package"""
+        if self._owners is None:
+            self._load()
+        return self._owners.get(package_name, ())
+
+    def __getitem__(self, name):
+        try:
+            return self._entries[name]
+        except KeyError:
+            pass
+        if self._maintained is None:
+            self._load()
+        package_names = self._maintained[name]
+        packages = {n: self._packages[n] for n in package_names}
+        entry = self._entries[name] = {
+            'name': name,
+            'packages': packages,
+            'status_index': StatusIndex(packages.values(), self._statuses),
+        }
+        return entry
+
+    def update_status_indexes(self):
+        """Rebuild status indexes of entries, after statuses changed"""
+        for entry in self._entries.values():
+            entry['status_index'] = StatusIndex(
+                entry['packages'].values(), self._statuses)
+
+    def __iter__(self):
+        if self._maintained is None:
+            self._load()
+        return iter(self._maintained)
+
+    def __len__(self):
+        if self._maintained is None:
+            self._load()
+        return len(self._maintained)
+
+    def __getstate__(self):
+        # Don't save loaded data; it's cheap to rebuild when needed
+        return self._load_owners, self._packages, self._statuses
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+class PackageMaintainers(collections.abc.Mapping):
+    """Read-only {name: maintainer} mapping for one package's maintainers"""
+    __slots__ = ('_index', '_package_name')
+
+    def __init__(self, index, package_name):
+        self._index = index
+        self._package_name = package_name
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return self._index[name]
+
+    def __contains__(self, name):
+        return name in self._index.owners(self._package_name)
+
+    def __iter__(self):
+        return iter(self._index.owners(self._package_name))
+
+    def __len__(self):
+        return len(self._index.owners(self._package_name))
+
+    def __repr__(self):
+        return '<PackageMaintainers {}>'.format(list(self))
+
+
+class SearchIndex:
+    """Search over names of packages, their RPMs, and maintainers
+
+    Names are matched case-insensitively, by prefix and by substring.
+    The index is built when it's first searched, since maintainer names
+    are only available after MaintainerIndex loads package owners.
+
+    Search keys (lowercased names) are kept sorted, so the keys with
+    a given prefix are a contiguous range, found by bisection; this works
+    like a prefix trie, but takes far less memory. Substrings of three
+    or more characters are found using a trigram index: each trigram maps
+    to the numbers of the keys that contain it, and only keys listed for
+    the query's rarest trigram are checked.
+    """
+    def __init__(self, packages, maintainers):
+        self._packages = packages
+        self._maintainers = maintainers
+        self._keys = None
+        self._entries = None
+        self._trigrams = None
+
+    def _build(self):
+        entries = {}
+        for name, package in self._packages.items():
+            entries.setdefault(name.lower(), []).append(
+                ('package', name, name))
+            rpm_names = {nvr.rsplit('-', 2)[0] for nvr in package['rpms']}
+            for rpm_name in sorted(rpm_names - {name}):
+                entries.setdefault(rpm_name.lower(), []).append(
+                    ('rpm', rpm_name, name))
+        for name in self._maintainers:
+            entries.setdefault(name.lower(), []).append(
+                ('maintainer', name, None))
+        keys = sorted(entries)
+        trigrams = {}
+        for i, key in enumerate(keys):
+            for trigram in {key[j:j+3] for j in range(len(key) - 2)}:
+                trigrams.setdefault(trigram, array.array('I')).append(i)
+        self._entries = [entries[key] for key in keys]
+        self._trigrams = trigrams
+        self._keys = keys
+
+    def search(self, query, limit=10):
+        """Return up to `limit` entries whose names match the query
+
+        Entries are (kind, name, package name) tuples, where kind is
+        'package', 'rpm' or 'maintainer' (with None as package name).
+        Names that start with the query come first, then names that
+        contain it. Each group is sorted by name.
+        """
+        if self._keys is None:
+            self._build()
+        keys = self._keys
+        query = query.strip().lower()
+        if not query or limit < 1:
+            return []
+
+        start = bisect.bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            if end - start >= limit:
+                break
+            end += 1
+        ids = list(range(start, end))
+
+        if len(ids) < limit and len(query) >= 3:
+            postings = [
+                self._trigrams.get(query[j:j+3], ())
+                for j in range(len(query) - 2)
+            ]
+            for i in min(postings, key=len):
+                if query in keys[i] and not keys[i].startswith(query):
+                    ids.append(i)
+                    if len(ids) >= limit:
+                        break
+
+        results = []
+        for i in ids:
+            results.extend(self._entries[i])
+        return results[:limit]
+
+    def __getstate__(self):
+        # Don't save the index; it's rebuilt when needed
+        return self._packages, self._maintainers
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+class History:
+    """Package counts per status over time, stored in columns
+
+    Built from rows of history CSV files (see scripts/get-history.py),
+    which have 'commit', 'date', 'status' and 'num_packages' columns.
+
+    commits and timestamps list the recorded commits and their dates,
+    in file order. statuses lists status idents in order of first
+    appearance; counts[c * len(statuses) + s] is the number of packages
+    with status s at commit c, or -1 if the commit has no count for it.
+
+    For graphs, the counts are also aggregated by day (the last commit of
+    each day wins): days holds dates as ordinals (see date.toordinal),
+    and day_counts[d * len(statuses) + s] is the count for day d.
+    Days are sorted.
+    """
+    def __init__(self, rows=()):
+        self.commits = []
+        self.timestamps = []
+        self.statuses = []
+        status_index = {}
+        by_commit = []
+        for row in rows:
+            if not self.commits or row['commit'] != self.commits[-1]:
+                self.commits.append(row['commit'])
+                self.timestamps.append(row['date'])
+                by_commit.append({})
+            s = status_index.get(row['status'])
+            if s is None:
+                s = status_index[row['status']] = len(self.statuses)
+                self.statuses.append(row['status'])
+            by_commit[-1][s] = int(row['num_packages'])
+
+        width = len(self.statuses)
+        self.counts = array.array('i', [-1]) * (len(self.commits) * width)
+        days = {}
+        for c, (timestamp, values) in enumerate(zip(self.timestamps,
+                                                    by_commit)):
+            day = days.setdefault(timestamp[:10], {})
+            for s, value in values.items():
+                self.counts[c * width + s] = value
+                day[s] = value
+
+        days = sorted(days.items())
+        self.days = array.array('I', (
+            datetime.date.fromisoformat(day).toordinal() for day, _ in days
+        ))
+        self.day_counts = array.array('I', (
+            values.get(s, 0) for day, values in days for s in range(width)
+        ))
+
+    def __len__(self):
+        return len(self.commits)
+
+    def day_values(self):
+        """Yield (date, {status: count}) for each recorded day"""
+        width = len(self.statuses)
+        for d, ordinal in enumerate(self.days):
+            row = self.day_counts[d * width:(d + 1) * width]
+            yield datetime.date.fromordinal(ordinal), dict(
+                zip(self.statuses, row))
+
+    def rows(self):
+        """Yield the history as rows for a CSV file"""
+        width = len(self.statuses)
+        for c, (commit, timestamp) in enumerate(zip(self.commits,
+                                                    self.timestamps)):
+            for s, status in enumerate(self.statuses):
+                value = self.counts[c * width + s]
+                if value >= 0:
+                    yield {
+                        'commit': commit,
+                        'date': timestamp,
+                        'status': status,
+                        'num_packages': value,
+                    }
@@ -21,6 +21,7 @@ import os
 import click
 
 from portingdb.load_data import get_data
+from portingdb.model import History
 
 
 HISTORY_END_COMMIT = '9c4e924da9ede05b4d8903a622240259dfa0e2e5'
@@ -87,11 +88,12 @@ def main(update):
     prev_commit = None
     if update:
         with open(update) as f:
-            for row in csv.DictReader(f):
-                excluded.add(row['commit'])
-                prev_date = row['date']
-                prev_commit = row['commit']
-                writer.writerow(row)
+            history = History(csv.DictReader(f))
+        excluded.update(history.commits)
+        if history.commits:
+            prev_date = history.timestamps[-1]
+            prev_commit = history.commits[-1]
+        writer.writerows(history.rows())
 
     try:
         tmpclone = os.path.join(tmpdir, 'tmp_clone')
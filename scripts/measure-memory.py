@@ -0,0 +1,50 @@
+#! /usr/bin/env python3
+"""Measure memory used by loading the portingdb data
+
+Prints the size of the loaded data as seen by tracemalloc, the peak
+allocation during loading, and the peak resident size of the process.
+Use this to compare loader changes on the full data set:
+
+    python3 scripts/measure-memory.py --datadir data/
+
+Add --parallel-load to measure loading with parallel decoding.
+"""
+
+import gc
+import resource
+import time
+import tracemalloc
+
+import click
+
+from portingdb.load_data import get_data
+
+
+@click.command(help=__doc__)
+@click.option('--datadir', multiple=True, default=['data'],
+              help='Data directory (can be given multiple times)')
+@click.option('--parallel-load/--no-parallel-load', default=False,
+              help='Decode data files in several processes')
+def main(datadir, parallel_load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    data = get_data(*datadir, parallel=parallel_load)
+    elapsed = time.perf_counter() - start
+    cpu_time = time.process_time() - cpu_start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print('packages:      {}'.format(len(data['packages'])))
+    print('load time:     {:.2f} s (traced)'.format(elapsed))
+    print('CPU time:      {:.2f} s (this process)'.format(cpu_time))
+    print('data size:     {:.1f} MB'.format(current / 1e6))
+    print('peak traced:   {:.1f} MB'.format(peak / 1e6))
+    print('peak RSS:      {:.1f} MB'.format(max_rss / 1e3))
+
+
+if __name__ == '__main__':
+    main()
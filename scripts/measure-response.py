@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+"""Measure time to first byte and memory used by rendering pages
+
+For each URL, prints the time until the first chunk of the body is
+produced (TTFB), the time until the whole body is produced, and the peak
+memory allocated during the request as seen by tracemalloc.
+The requests go directly to the WSGI application; each URL is requested
+once, so responses are not served from the in-memory stores.
+Templates are compiled, and package owners loaded, beforehand;
+those one-time costs are not included.
+
+    python3 scripts/measure-response.py --datadir data/ / /namingpolicy/
+
+Use --accept-encoding=gzip to measure what browsers get.
+Tracing memory slows rendering down; use --no-trace-memory to get
+more realistic times.
+"""
+
+import gc
+import time
+import tracemalloc
+
+import click
+from werkzeug.test import EnvironBuilder
+
+from portingdb.htmlreport import create_app
+
+
+def measure(app, url, accept_encoding, trace_memory):
+    headers = {}
+    if accept_encoding:
+        headers['Accept-Encoding'] = accept_encoding
+    environ = EnvironBuilder(path=url, headers=headers).get_environ()
+    status_holder = []
+
+    def start_response(status, headers, exc_info=None):
+        status_holder.append(status)
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        start_memory, _peak = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    ttfb = None
+    size = 0
+    body = app(environ, start_response)
+    try:
+        for chunk in body:
+            if chunk and ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    total = time.perf_counter() - start
+    if trace_memory:
+        _current, peak = tracemalloc.get_traced_memory()
+        peak -= start_memory
+    else:
+        peak = None
+    return status_holder[0], size, ttfb or total, total, peak
+
+
+@click.command(help=__doc__)
+@click.option('--datadir', multiple=True, default=['data'],
+              help='Data directory (can be given multiple times)')
+@click.option('--accept-encoding', default='',
+              help='Accept-Encoding header to send')
+@click.option('--trace-memory/--no-trace-memory', default=True,
+              help='Measure peak memory with tracemalloc')
+@click.argument('urls', nargs=-1)
+def main(datadir, accept_encoding, trace_memory, urls):
+    app = create_app(datadir)
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+    len(app.config['data']['maintainers'])
+    urls = urls or ['/', '/namingpolicy/', '/mispackaged/']
+    if trace_memory:
+        tracemalloc.start()
+    print('{:30} {:>6} {:>10} {:>9} {:>9} {:>10}'.format(
+        'URL', 'status', 'size', 'TTFB', 'total', 'peak'))
+    for url in urls:
+        status, size, ttfb, total, peak = measure(
+            app, url, accept_encoding, trace_memory)
+        if peak is None:
+            peak = '-'
+        else:
+            peak = '{:.1f}MB'.format(peak / 1e6)
+        print('{:30} {:>6} {:>10} {:>7.0f}ms {:>7.0f}ms {:>10}'.format(
+            url, status.split()[0], size, ttfb * 1000, total * 1000, peak))
+    if trace_memory:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
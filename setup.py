@@ -20,17 +20,23 @@ class PyTest(TestCommand):
 requires = [
     'PyYAML >= 3.11, < 5.0',
     'click >= 8.0, < 9.0',
-    'flask >= 2.0, < 3.0',
+    'flask >= 2.2, < 3.0',
     'markdown >= 3.0, < 4.0',
     'plotly >= 5.0, < 6.0',
     'blessings >= 1.7, < 2.0',
     'elsa >= 0.1.5, < 1.0',
-    'networkx >= 2.2, < 3.0',
     'python-bugzilla >= 3.0, < 4.0',
 ]
 
 tests_require = ['pytest']
 
+extras_require = {
+    # Caching rendered pages (portingdb serve --cache)
+    'cache': ['dogpile.cache >= 1.0, < 2.0'],
+    # Brotli encoding of precompressed pages
+    'brotli': ['brotli >= 1.0'],
+}
+
 setup_args = dict(
     name='portingdb',
     version='0.1',
@@ -51,6 +57,7 @@ setup_args = dict(
     ],
 
     install_requires=requires,
+    extras_require=extras_require,
 
     tests_require=tests_require,
     cmdclass={'test': PyTest},
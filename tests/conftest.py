@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from portingdb.htmlreport import create_app
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def make_rpm(python_version):
+    return {
+        'py_deps': {'python(abi) = 2.7': python_version},
+        'is_misnamed': False,
+        'non_python_requirers': {'run_time': [], 'build_time': []},
+        'arch': 'noarch',
+        'almost_leaf': False,
+        'legacy_leaf': False,
+    }
+
+
+# A small collection, used with the rest of the files in data/
+COLLECTION = {
+    'python-ply': {
+        'status': 'released',
+        'rpms': {'python3-ply-3.11-1.fc30.noarch': make_rpm(3)},
+        'deps': [],
+        'build_deps': [],
+    },
+    'python-foo': {
+        'status': 'idle',
+        'rpms': {'python2-foo-1.0-1.fc30.noarch': make_rpm(2)},
+        'tracking_bugs': [1285816],
+        'deps': ['python-ply', 'python-baz'],
+        'build_deps': ['python-ply'],
+    },
+    'python-bar': {
+        'status': 'idle',
+        'rpms': {'python2-bar-1.0-1.fc29.noarch': make_rpm(2)},
+        'tracking_bugs': [1285816, 1333770],
+        'deps': ['python-foo'],
+        'build_deps': ['python-qux'],
+    },
+    'python-baz': {
+        'status': 'mispackaged',
+        'note': 'Requires python2-qux',
+        'rpms': {
+            'python-baz-2.0-1.fc31.noarch': dict(
+                make_rpm(2), is_misnamed=True),
+        },
+        'deps': ['python-qux'],
+        'build_deps': [],
+    },
+    'python-qux': {
+        'status': 'idle',
+        'rpms': {'python2-qux-0.1-1.fc31.noarch': make_rpm(2)},
+        'deps': [],
+        'build_deps': [],
+    },
+    'pypy': {
+        'status': 'legacy-leaf',
+        'rpms': {'pypy-7.0-1.fc30.x86_64': make_rpm(2)},
+        'deps': ['python-bar'],
+        'build_deps': [],
+    },
+}
+
+# Package owners, in the format of pagure_owner_alias.json
+OWNERS = {
+    'rpms': {
+        'python-ply': ['spot', 'sgallagh'],
+        'python-foo': ['spot'],
+        'pypy': ['churchyard'],
+    },
+}
+
+
+@pytest.fixture
+def datadirs(tmp_path):
+    """Data directories with COLLECTION as the Fedora collection"""
+    with open(tmp_path / 'fedora.json', 'w') as f:
+        json.dump(COLLECTION, f)
+    with open(tmp_path / 'pagure_owner_alias.json', 'w') as f:
+        json.dump(OWNERS, f)
+    return [str(tmp_path), DATA_DIR]
+
+
+@pytest.fixture
+def client(datadirs):
+    return create_app(datadirs).test_client()
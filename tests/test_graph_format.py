@@ -0,0 +1,106 @@
+import struct
+
+import pytest
+
+from portingdb.graph_format import HEADER, MAGIC, VERSION, encode_graph
+
+
+def decode_graph(buffer):
+    """Decode the binary format into (nodes, links), like decodeGraph
+    in graph.html
+    """
+    magic, version, n, m, p, s = HEADER.unpack_from(buffer)
+    assert (magic, version) == (MAGIC, VERSION)
+    offset = HEADER.size
+
+    def take(item_format, length):
+        nonlocal offset
+        fmt = '<{}{}'.format(length, item_format)
+        values = struct.unpack_from(fmt, buffer, offset)
+        offset += struct.calcsize(fmt)
+        return values
+
+    links = take('I', 2 * m)
+    positions = take('f', 2 * n)
+    colors = take('H', n)
+    status_colors = take('H', n)
+    tiers = take('B', n)
+    rgb = take('B', 3 * p)
+    names = buffer[offset:offset + s].decode('utf-8').split('\n')
+    assert offset + s == len(buffer)
+
+    palette = [
+        '#{:02x}{:02x}{:02x}'.format(*rgb[3 * i:3 * i + 3]) for i in range(p)
+    ]
+    nodes = [
+        {
+            'name': names[i],
+            'color': palette[colors[i]],
+            'status_color': palette[status_colors[i]],
+            'tier': tiers[i],
+            'x': positions[2 * i],
+            'y': positions[2 * i + 1],
+        }
+        for i in range(n)
+    ]
+    links = [(links[2 * i], links[2 * i + 1]) for i in range(m)]
+    return nodes, links
+
+
+def test_encode_graph():
+    nodes = [
+        {'name': 'python-ply', 'color': '#2d9510', 'status_color': '#2d9510',
+         'tier': 0, 'x': 1.5, 'y': -2.25},
+        {'name': 'python-ěšč', 'color': '#00ff00',
+         'status_color': '#2d9510', 'tier': 300, 'x': 0, 'y': 100},
+    ]
+    links = [(0, 1), (1, 0), (1, 1)]
+    encoded = encode_graph(nodes, links)
+    assert encoded[:4] == b'PDBG'
+
+    decoded_nodes, decoded_links = decode_graph(encoded)
+    assert decoded_links == links
+    assert decoded_nodes[0] == nodes[0]
+    # Tiers are capped to fit in a byte
+    assert decoded_nodes[1] == dict(nodes[1], tier=255)
+
+
+@pytest.mark.parametrize('url', [
+    '/graph/portingdb',
+    '/grp/pypy/graph',
+    '/pkg/python-foo/graph',
+])
+def test_binary_matches_json(client, url):
+    expected = client.get(url + '.json').get_json()
+    nodes, links = decode_graph(client.get(url + '.bin').data)
+
+    assert expected['nodes']
+    assert [n['name'] for n in nodes] == [n['name'] for n in expected['nodes']]
+    for node, expected_node in zip(nodes, expected['nodes']):
+        assert node['tier'] == expected_node['tier']
+        # Colors are decoded in lowercase; in CSS, case doesn't matter
+        for key in 'color', 'status_color':
+            assert node[key] == expected_node[key].lower()
+        # Coordinates are stored as 32-bit floats
+        for key in 'x', 'y':
+            assert node[key] == pytest.approx(expected_node[key], rel=1e-6)
+    assert links == [(l['source'], l['target']) for l in expected['links']]
+
+
+@pytest.mark.parametrize('url', [
+    '/graph/portingdb.bin',
+    '/grp/pypy/graph.bin',
+    '/pkg/python-foo/graph.bin',
+])
+def test_binary_response(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content_type == 'application/octet-stream'
+    assert response.data[:4] == b'PDBG'
+
+    etag = response.headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    assert client.get('/grp/nonexistent/graph.bin').status_code == 404
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from portingdb.graph_layout import (
+    HEIGHT, MARGIN, WIDTH, force_layout, sublayout,
+)
+
+
+def random_graph(n, seed):
+    rng = random.Random(seed)
+    tiers = [rng.randrange(6) for i in range(n)]
+    links = [(rng.randrange(n), rng.randrange(n)) for i in range(2 * n)]
+    return tiers, links
+
+
+def in_canvas(position, margin=0):
+    x, y = position
+    return margin <= x <= WIDTH - margin and margin <= y <= HEIGHT - margin
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 50, 300])
+def test_force_layout(n):
+    tiers, links = random_graph(n, seed=n)
+    positions = force_layout(tiers, links)
+    assert len(positions) == n
+    for position in positions:
+        assert len(position) == 2
+        assert in_canvas(position)
+    assert force_layout(tiers, links) == positions
+    # Nodes are kept apart
+    assert len(set(positions)) == n
+
+
+def test_sublayout():
+    positions = force_layout(*random_graph(50, seed=0))
+    subset = positions[:10] + [None, None]
+    result = sublayout(subset)
+    assert len(result) == len(subset)
+    for position in result:
+        assert in_canvas(position, MARGIN - 0.1)
+    assert len(set(result)) == len(subset)
+
+
+def test_sublayout_only_missing():
+    result = sublayout([None] * 3)
+    assert len(set(result)) == 3
+    for position in result:
+        assert in_canvas(position, MARGIN - 0.1)
+    assert sublayout([]) == []
@@ -0,0 +1,293 @@
+import warnings
+
+import pytest
+
+from portingdb import htmlreport
+from portingdb.htmlreport import create_app, response_etag
+from portingdb.load_data import update_packages
+from portingdb.model import SearchIndex
+
+
+@pytest.mark.parametrize('url', [
+    '/pkg/python-foo/',
+    '/grp/pypy/',
+    '/status/idle.svg',
+])
+def test_not_modified(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    assert client.get(
+        url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(
+        url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+@pytest.mark.parametrize('url', [
+    '/pkg/nonexistent/',
+    '/pkg/nonexistent/graph.json',
+    '/grp/nonexistent/',
+    '/maintainer/nonexistent/',
+    '/status/nonexistent.svg',
+])
+def test_conditional_request_for_missing_page(client, url):
+    etag = client.get('/').headers['ETag']
+    last_modified = client.get('/').headers['Last-Modified']
+    assert client.get(
+        url, headers={'If-None-Match': etag}).status_code == 404
+    assert client.get(
+        url, headers={'If-Modified-Since': last_modified}).status_code == 404
+
+
+def test_responses_follow_updated_data(datadirs):
+    app = create_app(
+        datadirs, cache_config={'backend': 'dogpile.cache.memory'})
+    client = app.test_client()
+    data = app.config['data']
+    urls = ['/', '/pkg/python-qux/', '/piechart.svg', '/stats.json']
+    before = {url: client.get(url) for url in urls}
+
+    updates = dict(data['package_updates'])
+    updates['python-qux'] = {'status': 'released'}
+    update_packages(data, datadirs, updates=updates)
+
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != before[url].headers['ETag']
+        assert response.data != before[url].data
+
+
+def test_maintainer_status_summary(datadirs):
+    app = create_app(datadirs)
+    client = app.test_client()
+    data = app.config['data']
+    name = next(iter(data['packages']['python-ply']['maintainers']))
+    url = '/maintainer/{}/'.format(name)
+
+    def title(status):
+        return 'title="1 {}"'.format(data['statuses'][status]['name'])
+
+    assert title('py3-only') in client.get(url).data.decode()
+
+    updates = dict(data['package_updates'])
+    updates['python-ply'] = {'status': 'dropped'}
+    update_packages(data, datadirs, updates=updates)
+
+    page = client.get(url).data.decode()
+    assert title('dropped') in page
+    assert title('py3-only') not in page
+
+
+def test_freeze(datadirs, tmp_path, monkeypatch):
+    flask_frozen = pytest.importorskip('flask_frozen')
+    # Send streamed pages in small pieces, like big pages would be
+    monkeypatch.setattr(htmlreport, '_join_chunks', iter)
+    app = create_app(datadirs, frozen=True)
+    app.config['FREEZER_DESTINATION'] = str(tmp_path / 'build')
+    freezer = flask_frozen.Freezer(app)
+    with warnings.catch_warnings():
+        # Like `elsasite.py freeze`
+        warnings.simplefilter('error', flask_frozen.FrozenFlaskWarning)
+        freezer.freeze()
+
+    groups = [
+        ident for ident, group in app.config['data']['groups'].items()
+        if group['packages']
+    ]
+    assert groups
+    for ident in groups:
+        assert (tmp_path / 'build/grp' / ident / 'graph/index.html').exists()
+
+
+@pytest.mark.parametrize('url', [
+    '/graph/?all_deps=2',
+    '/api/packages?is_misnamed=maybe',
+    '/api/packages?limit=0',
+    '/api/packages?min_ftbfs_age=old',
+    '/api/packages?fields=nonexistent',
+])
+def test_conditional_request_with_bad_arguments(client, url):
+    # The ETag a good response for the URL would have
+    app = client.application
+    with app.test_request_context(url):
+        etag = response_etag(app.config['data']['fingerprint'])
+    last_modified = client.get('/').headers['Last-Modified']
+    assert client.get(
+        url, headers={'If-None-Match': etag}).status_code == 400
+    assert client.get(
+        url, headers={'If-Modified-Since': last_modified}).status_code == 400
+
+
+@pytest.mark.parametrize('url', [
+    '/graph/?all_deps=1',
+    '/api/packages?status=idle&limit=1',
+])
+def test_not_modified_with_arguments(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    assert client.get(
+        url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(
+        url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_graph_layout_computed_at_startup(datadirs, monkeypatch):
+    client = create_app(datadirs).test_client()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('graph laid out in a request')
+
+    monkeypatch.setattr(htmlreport, 'force_layout', fail)
+    assert client.get('/graph/portingdb.json').status_code == 200
+    assert client.get('/grp/pypy/graph.bin').status_code == 200
+
+
+def walk_api_packages(client, query):
+    """Return names of packages from all pages of /api/packages"""
+    names = []
+    cursor = None
+    while True:
+        args = dict(query)
+        if cursor is not None:
+            args['cursor'] = cursor
+        response = client.get('/api/packages', query_string=args)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['packages']) <= int(query.get('limit', 100))
+        names.extend(package['name'] for package in page['packages'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize('limit', ['1', '2', '5', '6', '100'])
+@pytest.mark.parametrize('status', [None, 'idle,blocked,py3-only'])
+def test_api_packages_cursor(client, limit, status):
+    query = {'limit': limit}
+    if status is not None:
+        query['status'] = status
+    names = walk_api_packages(client, query)
+    packages = client.application.config['data']['packages']
+    assert names == sorted(
+        name for name, package in packages.items()
+        if status is None or package['status'] in status.split(',')
+    )
+
+
+@pytest.mark.parametrize(('query', 'predicate'), [
+    ({'status': 'blocked'}, lambda p: p['status'] == 'blocked'),
+    ({'status': 'idle,blocked'},
+     lambda p: p['status'] in ('idle', 'blocked')),
+    ({'status': 'nonexistent'}, lambda p: False),
+    ({'group': 'pypy'}, lambda p: 'pypy' in p['groups']),
+    ({'group': 'nonexistent'}, lambda p: False),
+    ({'maintainer': 'spot'}, lambda p: 'spot' in p['maintainers']),
+    ({'maintainer': 'spot,churchyard,nobody'},
+     lambda p: {'spot', 'churchyard'} & set(p['maintainers'])),
+    ({'tracker': '1333770'}, lambda p: 1333770 in p['tracking_bugs']),
+    ({'tracker': '1285816'}, lambda p: 1285816 in p['tracking_bugs']),
+    ({'is_misnamed': 'true'}, lambda p: p['is_misnamed']),
+    ({'is_misnamed': 'false'}, lambda p: not p['is_misnamed']),
+    ({'min_ftbfs_age': '1'}, lambda p: p['ftbfs_age'] >= 1),
+    ({'min_ftbfs_age': '2'}, lambda p: p['ftbfs_age'] >= 2),
+    ({'status': 'blocked', 'tracker': '1285816'},
+     lambda p: p['status'] == 'blocked' and 1285816 in p['tracking_bugs']),
+    ({'maintainer': 'spot', 'min_ftbfs_age': '1', 'is_misnamed': 'false'},
+     lambda p: ('spot' in p['maintainers'] and p['ftbfs_age'] >= 1
+                and not p['is_misnamed'])),
+    ({'group': 'pypy', 'status': 'mispackaged,legacy-leaf'},
+     lambda p: p['status'] in ('mispackaged', 'legacy-leaf')),
+])
+def test_api_packages_filters(client, query, predicate):
+    packages = client.application.config['data']['packages']
+    expected = sorted(
+        name for name, package in packages.items() if predicate(package))
+    assert walk_api_packages(client, dict(query, limit='2')) == expected
+
+
+def test_api_packages_cursor_between_names(client):
+    # The cursor doesn't need to be a package name
+    response = client.get('/api/packages?cursor=python-c')
+    names = [p['name'] for p in response.get_json()['packages']]
+    assert names == ['python-foo', 'python-ply', 'python-qux']
+
+
+def test_search_ranking():
+    packages = {
+        'foo': {'rpms': {'python3-foo-1.0-1.fc30.noarch': {}}},
+        'barfoo': {'rpms': {'barfoo-1.0-1.fc30.noarch': {}}},
+        'foobar': {'rpms': {}},
+        'python-foo': {'rpms': {'python2-foo-1.0-1.fc30.noarch': {}}},
+    }
+    index = SearchIndex(packages, ['Foonly', 'bob'])
+    expected = [
+        # Names starting with the query, by name
+        ('package', 'foo', 'foo'),
+        ('package', 'foobar', 'foobar'),
+        ('maintainer', 'Foonly', None),
+        # Names containing it, by name
+        ('package', 'barfoo', 'barfoo'),
+        ('package', 'python-foo', 'python-foo'),
+        ('rpm', 'python2-foo', 'python-foo'),
+        ('rpm', 'python3-foo', 'foo'),
+    ]
+    assert index.search('foo', limit=100) == expected
+    assert index.search(' FOO ', limit=100) == expected
+    assert index.search('foo', limit=4) == expected[:4]
+    assert index.search('fo', limit=100) == expected[:3]
+    assert index.search('', limit=100) == []
+    assert index.search('foo', limit=0) == []
+
+
+def test_api_search(client):
+    response = client.get('/api/search?q=qux')
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'kind': 'package', 'name': 'python-qux', 'package': 'python-qux',
+         'url': '/pkg/python-qux/'},
+        {'kind': 'rpm', 'name': 'python2-qux', 'package': 'python-qux',
+         'url': '/pkg/python-qux/'},
+    ]
+    results = client.get('/api/search?q=py&limit=2').get_json()['results']
+    assert [r['name'] for r in results] == ['pypy', 'python-bar']
+
+
+@pytest.mark.parametrize(('query', 'url'), [
+    ('python-foo', '/pkg/python-foo/'),
+    ('PYTHON-FOO', '/pkg/python-foo/'),
+    ('python3-ply', '/pkg/python-ply/'),
+    ('spot', '/maintainer/spot/'),
+])
+def test_search_exact_match_redirects(client, query, url):
+    response = client.get('/search/', query_string={'q': query})
+    assert response.status_code == 302
+    assert response.headers['Location'] == url
+
+
+def test_search_results_page(client):
+    response = client.get('/search/?q=python')
+    assert response.status_code == 200
+    page = response.data.decode()
+    assert 'href="/pkg/python-foo/"' in page
+    assert 'Nothing found' not in page
+
+
+@pytest.mark.parametrize('query', ['', '   ', 'nonexistent'])
+def test_search_without_results(client, query):
+    response = client.get('/search/', query_string={'q': query})
+    assert response.status_code == 200
+    assert 'Nothing found' in response.data.decode()
+    response = client.get('/api/search', query_string={'q': query})
+    assert response.get_json()['results'] == []
+
+
+@pytest.mark.parametrize('url', ['/search/', '/api/search'])
+def test_search_query_too_long(client, url):
+    query = 'python-foo' * 100
+    response = client.get(url, query_string={'q': query})
+    assert response.status_code == 400
+    assert query not in response.data.decode()
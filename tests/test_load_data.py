@@ -0,0 +1,208 @@
+import collections.abc
+import datetime
+import json
+import os
+import random
+
+import pytest
+
+import portingdb.load_data
+import portingdb.model
+from portingdb.load_data import (
+    data_fingerprint, data_last_modified, get_data, iter_json_items,
+    update_packages,
+)
+from portingdb.model import Package, Record
+
+from conftest import COLLECTION
+
+STATUSES = [
+    'py3-only', 'legacy-leaf', 'released', 'mispackaged', 'idle', 'blocked',
+    'dropped', 'unknown',
+]
+
+
+def random_updates(rng):
+    """Return random overrides for packages in COLLECTION"""
+    updates = {}
+    names = sorted(COLLECTION)
+    for name in names:
+        update = {}
+        if rng.random() < 0.4:
+            update['status'] = rng.choice(STATUSES)
+        if rng.random() < 0.2:
+            update['nonblocking'] = rng.choice([True, False])
+        if rng.random() < 0.2:
+            update['note'] = 'Note for {}'.format(name)
+        if rng.random() < 0.2:
+            update['is_misnamed'] = rng.choice([True, False])
+        for kind in 'deps', 'build_deps':
+            if rng.random() < 0.2:
+                others = [n for n in names if n != name]
+                update[kind] = rng.sample(others, rng.randrange(3))
+        if update:
+            updates[name] = update
+    return updates
+
+
+def write_updates(datadirs, updates):
+    # The first directory is searched first, so this overrides
+    # fedora-update.yaml from the repo's data
+    with open(datadirs[0] + '/fedora-update.json', 'w') as f:
+        json.dump(updates, f)
+
+
+def normalize(value):
+    """Convert loaded data to plain values that can be compared"""
+    if isinstance(value, Package):
+        return value['name']
+    if isinstance(value, Record):
+        return {key: normalize(value[key]) for key in value}
+    if isinstance(value, collections.abc.Mapping):
+        return {key: normalize(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def summarize(data):
+    packages = {}
+    for name, package in data['packages'].items():
+        packages[name] = {
+            key: (
+                sorted(package[key]) if key in ('groups', 'maintainers')
+                else normalize(package[key])
+            )
+            for key in package
+        }
+    return {
+        'packages': packages,
+        'status_summary': normalize(data['status_index'].summary),
+        'groups': {
+            ident: (
+                sorted(group['packages']),
+                normalize(group['status_index'].summary),
+            )
+            for ident, group in data['groups'].items()
+        },
+        'non_python_unversioned_requires': normalize(
+            data['non_python_unversioned_requires']),
+        'fingerprint': data['fingerprint'],
+    }
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_update_packages_matches_reload(datadirs, seed):
+    rng = random.Random(seed)
+    write_updates(datadirs, random_updates(rng))
+    data = get_data(*datadirs)
+
+    write_updates(datadirs, random_updates(rng))
+    update_packages(data, datadirs)
+
+    assert summarize(data) == summarize(get_data(*datadirs))
+
+
+def test_last_modified_follows_code(datadirs, tmp_path, monkeypatch):
+    # Last-Modified must change whenever the fingerprint (and so the
+    # ETag) does, including when the code changes
+    fingerprint = data_fingerprint(datadirs)
+    last_modified = data_last_modified(datadirs)
+
+    new_model = tmp_path / 'model.py'
+    new_model.write_text('# New code\n')
+    mtime = last_modified.timestamp() + 60
+    os.utime(new_model, (mtime, mtime))
+    monkeypatch.setattr(portingdb.model, '__file__', str(new_model))
+
+    assert data_fingerprint(datadirs) != fingerprint
+    assert data_last_modified(datadirs) == datetime.datetime.fromtimestamp(
+        mtime, tz=datetime.timezone.utc)
+
+
+def test_snapshot(datadirs, tmp_path, monkeypatch):
+    snapshot_dir = str(tmp_path / 'snapshots')
+    write_updates(datadirs, random_updates(random.Random(0)))
+    data = get_data(*datadirs, snapshot_dir=snapshot_dir)
+    expected = summarize(data)
+
+    def fail_to_load(*args, **kwargs):
+        raise AssertionError('data loaded again')
+
+    with monkeypatch.context() as m:
+        m.setattr(portingdb.load_data, 'load_from_directories', fail_to_load)
+        snapshot = get_data(*datadirs, snapshot_dir=snapshot_dir)
+    assert snapshot is not data
+    assert summarize(snapshot) == expected
+    assert len(os.listdir(snapshot_dir)) == 1
+
+    # When the input changes, the snapshot is replaced
+    write_updates(datadirs, random_updates(random.Random(1)))
+    data = get_data(*datadirs, snapshot_dir=snapshot_dir)
+    assert summarize(data) == summarize(get_data(*datadirs))
+    assert summarize(data) != expected
+    assert len(os.listdir(snapshot_dir)) == 1
+
+
+def test_snapshots_of_other_directories_kept(datadirs, tmp_path):
+    snapshot_dir = str(tmp_path / 'snapshots')
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    other_dirs = [str(other_dir)] + datadirs
+    get_data(*datadirs, snapshot_dir=snapshot_dir)
+    get_data(*other_dirs, snapshot_dir=snapshot_dir)
+    assert len(os.listdir(snapshot_dir)) == 2
+
+
+JSON_DOCUMENTS = [
+    '{}',
+    ' \n{ }\n',
+    '{"a": {"b": [1, 2.5, -3e10, {"c": null}], "d": {}}, "e": [[], [[]]]}',
+    '{"t": true, "f": false, "n": null, "big": 12345678901234567890}',
+    r'{"q\"uote": "back\\slash \/ \n\té", "ě": "ě ✓"}',
+    r'{"emoji": "😀", "raw": "😀", "🐍": 1}',
+    '{\n  "a" :\t1 ,\r\n "b"  :  [ 1 , 2 ]  ,"c":"x"  \n}\n\n',
+    '{"a": 1, "a": 2}',
+]
+
+
+@pytest.mark.parametrize('document', JSON_DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1 << 16])
+def test_iter_json_items(tmp_path, document, chunk_size):
+    path = tmp_path / 'test.json'
+    path.write_text(document, encoding='utf-8')
+    items = list(iter_json_items(str(path), chunk_size))
+    assert dict(items) == json.loads(document)
+    # All pairs are yielded in order, even with duplicate keys
+    pairs = json.loads(document, object_pairs_hook=list)
+    assert [key for key, value in items] == [key for key, value in pairs]
+
+
+@pytest.mark.parametrize('document', [
+    '',
+    '  ',
+    '[1, 2]',
+    '"a"',
+    '{',
+    '{"a": 1',
+    '{"a": 1,}',
+    '{"a" 1}',
+    '{"a": tru}',
+    '{"a": [1, 2}',
+    '{"a": "unterminated}',
+    '{1: 2}',
+    '{a: 2}',
+    '{"a": 1} x',
+    '{"a": 1}{"b": 2}',
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 1 << 16])
+def test_iter_json_items_malformed(tmp_path, document, chunk_size):
+    path = tmp_path / 'test.json'
+    path.write_text(document, encoding='utf-8')
+    items = []
+    with pytest.raises(ValueError) as excinfo:
+        for item in iter_json_items(str(path), chunk_size):
+            items.append(item)
+    assert str(path) in str(excinfo.value)
+    # Items before the error are complete
+    assert items == [('a', 1)] * len(items)
@@ -0,0 +1,287 @@
+import random
+import sys
+
+import pytest
+
+from portingdb.htmlreport import graph_tiers
+from portingdb.load_data import DONE_STATUSES, get_data
+from portingdb.model import (
+    DepGraph, MaintainerIndex, Package, PackageIndex, Reachability,
+    rpm_nvr, strongly_connected_components,
+)
+
+
+def make_package(name, rpms):
+    return {
+        'name': name,
+        'status': 'idle',
+        'groups': {},
+        'tracking_bugs': (),
+        'ftbfs_age': 0,
+        'is_misnamed': False,
+        'rpms': {rpm: {} for rpm in rpms},
+    }
+
+
+@pytest.mark.parametrize(('nevra', 'expected'), [
+    ('python3-ply-3.11-1.fc30.noarch', 'python3-ply-3.11-1.fc30'),
+    ('python3-ply-0:3.11-1.fc30.noarch', 'python3-ply-3.11-1.fc30'),
+    ('python3-ply-3.11-1.fc30', 'python3-ply-3.11-1.fc30'),
+    ('python3-ply.x86_64', 'python3-ply'),
+    ('python3-ply', 'python3-ply'),
+])
+def test_rpm_nvr(nevra, expected):
+    assert rpm_nvr(nevra) == expected
+
+
+@pytest.fixture
+def index():
+    # RPM keys are in the format the dnf plugin writes: N-[E:]V-R.A
+    return PackageIndex([
+        make_package('python-ply', [
+            'python3-ply-3.11-1.fc30.noarch',
+            'python2-ply-3.11-1.fc30.noarch',
+        ]),
+        make_package('python3', [
+            'python3-3.7.3-1.fc30.x86_64',
+            'python3-libs-3.7.3-1.fc30.x86_64',
+        ]),
+        make_package('pygobject2', [
+            'pygobject2-2.28.7-5.fc30.x86_64',
+            'pygobject2-codegen-2.28.7-5.fc30.x86_64',
+        ]),
+        make_package('perl-Foo', ['perl-Foo-1:0.5-2.fc31.noarch']),
+    ])
+
+
+@pytest.mark.parametrize(('name', 'expected'), [
+    ('python-ply', 'python-ply'),
+    ('python3-ply', 'python-ply'),
+    ('python3-ply-3.11-1.fc30.noarch', 'python-ply'),
+    ('python3-ply-0:3.11-1.fc30.noarch', 'python-ply'),
+    ('python3-ply-3.11-1.fc30', 'python-ply'),
+    ('python3-ply.noarch', 'python-ply'),
+    ('python3-libs-3.7.3-1.fc30.x86_64', 'python3'),
+    ('pygobject2-codegen-2.28.7-5.fc30.i686', 'pygobject2'),
+    ('perl-Foo-1:0.5-2.fc31.noarch', 'perl-Foo'),
+    ('perl-Foo-0.5-2.fc31', 'perl-Foo'),
+    # Other builds of known RPMs
+    ('python3-ply-3.11-2.fc31.noarch', 'python-ply'),
+    ('python3-libs-3.8.0-1.fc32.x86_64', 'python3'),
+])
+def test_find(index, name, expected):
+    assert index.names[index.find(name)] == expected
+
+
+@pytest.mark.parametrize('name', [
+    'python3-unknown',
+    'python3-unknown-1.0-1.fc30.noarch',
+    'nonexistent',
+])
+def test_find_unknown(index, name):
+    assert index.find(name) is None
+
+
+def test_maintainer_index_not_visible_while_loading():
+    packages = {
+        'python-ply': make_package('python-ply', []),
+        'python3': make_package('python3', []),
+    }
+
+    class Owners(dict):
+        def get(self, name, default=None):
+            # Other threads must not see a partly built index
+            assert index._owners is None
+            assert index._maintained is None
+            return super().get(name, default)
+
+    owners = Owners({'python-ply': ['alice', 'bob'], 'python3': ['bob']})
+    index = MaintainerIndex(lambda: owners, packages, {})
+    assert index.owners('python-ply') == ('alice', 'bob')
+    assert sorted(index['bob']['packages']) == ['python-ply', 'python3']
+
+
+def reachable_from(successors, start):
+    """Brute-force transitive closure: nodes reachable from start"""
+    seen = {start}
+    to_visit = [start]
+    while to_visit:
+        for w in successors[to_visit.pop()]:
+            if w not in seen:
+                seen.add(w)
+                to_visit.append(w)
+    return seen
+
+
+def random_edges(n, seed):
+    rng = random.Random(seed)
+    return [
+        [rng.randrange(n) for i in range(rng.randrange(4))]
+        for v in range(n)
+    ]
+
+
+SCC_GRAPHS = [
+    [],
+    [[]],
+    [[0]],
+    [[1], [0]],
+    [[1], [2], [0], [2, 4], [3], []],
+    [[0, 1], [1, 2], [2]],
+    [[1], [0], [3], [2], [0, 2]],
+] + [random_edges(30, seed) for seed in range(10)]
+
+
+@pytest.mark.parametrize('successors', SCC_GRAPHS)
+def test_strongly_connected_components(successors):
+    n = len(successors)
+    component, members = strongly_connected_components(
+        n, successors.__getitem__)
+    closure = [reachable_from(successors, v) for v in range(n)]
+    for v in range(n):
+        assert v in members[component[v]]
+        for w in range(n):
+            same = v in closure[w] and w in closure[v]
+            assert (component[v] == component[w]) == same
+    assert sorted(v for scc in members for v in scc) == list(range(n))
+    # Edges go from higher to lower component numbers
+    for v in range(n):
+        for w in successors[v]:
+            assert component[v] >= component[w]
+
+
+def test_strongly_connected_components_long_chain():
+    n = sys.getrecursionlimit() * 3
+    chain = [[v + 1] for v in range(n - 1)] + [[]]
+    component, members = strongly_connected_components(n, chain.__getitem__)
+    assert len(members) == n
+    assert component[0] == n - 1
+
+    # Closing the chain makes one big cycle
+    chain[-1] = [0]
+    component, members = strongly_connected_components(n, chain.__getitem__)
+    assert len(members) == 1
+
+
+def make_graph(deps, build_deps=None, statuses=None):
+    if statuses is None:
+        statuses = ['idle'] * len(deps)
+    packages = [
+        Package({'name': 'pkg{}'.format(v), 'status': status})
+        for v, status in enumerate(statuses)
+    ]
+
+    def names(lists):
+        return [['pkg{}'.format(w) for w in targets] for targets in lists]
+
+    if build_deps is None:
+        build_deps = [[] for v in deps]
+    return DepGraph(
+        packages, names(deps), names(build_deps), done_statuses=(),
+    )
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_reachability(seed):
+    deps = random_edges(40, seed)
+    build_deps = random_edges(40, seed + 100)
+    both = [a + b for a, b in zip(deps, build_deps)]
+    reachable = Reachability(make_graph(deps, build_deps))
+    rng = random.Random(seed)
+    for i in range(20):
+        ids = rng.sample(range(40), rng.randrange(4))
+        expected = set().union(*(reachable_from(both, v) for v in ids))
+        assert reachable(ids) == expected
+
+    reachable = Reachability(make_graph(deps, build_deps), kinds=('deps', ))
+    assert reachable([0]) == reachable_from(deps, 0)
+
+
+def test_reachability_long_chain():
+    n = sys.getrecursionlimit() * 3
+    deps = [[v + 1] for v in range(n - 1)] + [[]]
+    reachable = Reachability(make_graph(deps))
+    assert reachable([n - 10]) == set(range(n - 10, n))
+    assert reachable([0]) == set(range(n))
+
+
+def brute_force_tiers(dep_graph):
+    """Tiers as graph_tiers defines them, by repeatedly removing leaves
+
+    Clusters are found from the transitive closure of the links.
+    """
+    packages = dep_graph.packages
+    links = {
+        (j, i)
+        for i in range(len(packages))
+        for kind in ('dependents', 'build_dependents')
+        for j in dep_graph.neighbors(kind, i)
+        if not (packages[i]['status'] == packages[j]['status'] == 'py3-only')
+    }
+    dependencies = [[] for p in packages]
+    for dependent, dependency in links:
+        dependencies[dependent].append(dependency)
+    closure = [
+        reachable_from(dependencies, v) for v in range(len(packages))
+    ]
+    linked = {v for link in links for v in link}
+    cluster = {
+        v: frozenset(w for w in closure[v] if v in closure[w])
+        for v in linked
+    }
+
+    # Clusters with links to other clusters are removed in tiers
+    remaining = {
+        cluster[v] for link in links for v in link
+        if cluster[link[0]] != cluster[link[1]]
+    }
+    cluster_tiers = {}
+    tier = 0
+    while remaining:
+        tier += 1
+        leaves = {
+            c for c in remaining
+            if not any(
+                cluster[a] in remaining and cluster[a] != c
+                for a, b in links if b in c
+            )
+        }
+        assert leaves
+        for c in leaves:
+            cluster_tiers[c] = tier
+        remaining -= leaves
+
+    tiers = {}
+    for v in linked:
+        tier = cluster_tiers.get(cluster[v], 0)
+        rep = min(cluster[v], key=lambda j: dep_graph.names[j])
+        if tier == 1 and packages[rep]['status'] in DONE_STATUSES:
+            tier = 0
+        tiers[v] = tier
+    return links, tiers
+
+
+def check_tiers(dep_graph):
+    links, tiers = graph_tiers(dep_graph)
+    expected_links, expected_tiers = brute_force_tiers(dep_graph)
+    assert set(links) == expected_links
+    assert tiers == expected_tiers
+
+
+def test_graph_tiers(datadirs):
+    dep_graph = get_data(*datadirs)['graph']
+    check_tiers(dep_graph)
+    assert max(graph_tiers(dep_graph)[1].values()) > 1
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_graph_tiers_random(seed):
+    rng = random.Random(seed)
+    n = 30
+    statuses = [
+        rng.choice(['idle', 'blocked', 'py3-only', 'legacy-leaf'])
+        for v in range(n)
+    ]
+    dep_graph = make_graph(
+        random_edges(n, seed), random_edges(n, seed + 100), statuses)
+    check_tiers(dep_graph)
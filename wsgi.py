@@ -29,7 +29,8 @@ cache_config = {
     }
 } if redis_configured else None
 
-application = htmlreport.create_app(cache_config=cache_config)
+application = htmlreport.create_app(
+    directories=['data'], cache_config=cache_config)
 
 
 if __name__ == '__main__':